@@ -0,0 +1,66 @@
+"""
+Requests per second of async views reading with aget() and async for, 100 at
+a time, with the statements awaited on the asyncio connection compared with
+Django's sync_to_async() thread. Needs the local YDB of the test suite.
+
+    python -m benchmarks.bench_async
+"""
+import asyncio
+import time
+
+from .common import report
+from .common import setup
+
+ROWS = 1000
+REQUESTS = 2000
+CONCURRENCY = 100
+
+
+async def _request(model, number):
+    token = await model.objects.aget(token_id=str(number % ROWS))
+    [other async for other in model.objects.filter(owner=token.owner)[:10]]
+
+
+async def _run(model):
+    semaphore = asyncio.Semaphore(CONCURRENCY)
+
+    async def request(number):
+        async with semaphore:
+            await _request(model, number)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(request(number) for number in range(REQUESTS)))
+    return time.perf_counter() - start
+
+
+def main():
+    setup()
+
+    from django.db import connection
+
+    from compiler.models import NFTToken
+
+    with connection.schema_editor() as editor:
+        editor.create_model(NFTToken)
+    try:
+        NFTToken.objects.bulk_create(
+            NFTToken(
+                contract_address="0x0",
+                token_id=str(number),
+                owner=f"0x{number % 10}",
+                metadata_url="",
+                last_price=0.0,
+            )
+            for number in range(ROWS)
+        )
+        for name, native in [("sync_to_async", False), ("native", True)]:
+            connection.settings_dict["OPTIONS"]["native_async"] = native
+            duration = asyncio.run(_run(NFTToken))
+            report(f"{REQUESTS} requests, {name}", REQUESTS / duration, "req/s")
+    finally:
+        with connection.schema_editor() as editor:
+            editor.delete_model(NFTToken)
+
+
+if __name__ == "__main__":
+    main()
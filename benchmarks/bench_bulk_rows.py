@@ -0,0 +1,73 @@
+"""
+Building the $in_ struct list of a bulk INSERT for 1M rows, compared with
+the per-cell conversion the write compilers used before. Runs without a
+database.
+
+    python -m benchmarks.bench_bulk_rows
+"""
+import datetime
+
+from .common import measure
+from .common import report
+from .common import setup
+
+ROWS = 1_000_000
+
+
+def _get_data_per_cell(fields, param_rows):
+    result = []
+
+    for i in range(len(param_rows)):
+        struct = {}
+        for j in range(len(fields)):
+            if fields[j].get_internal_type() == "DateTimeField":
+                struct[fields[j].column] = int(param_rows[i][j].timestamp())
+            else:
+                struct[fields[j].column] = param_rows[i][j]
+        result.append(struct)
+
+    return result
+
+
+def main():
+    setup()
+
+    from ydb_backend.models.sql.compiler import _get_data
+
+    from type.models import TimeModel
+
+    fields = [
+        field for field in TimeModel._meta.concrete_fields if not field.primary_key
+    ]
+    now = datetime.datetime.now(tz=datetime.timezone.utc)
+    param_rows = [
+        [now.date(), now, datetime.timedelta(seconds=i)] for i in range(ROWS)
+    ]
+
+    report(
+        f"{ROWS} rows, per-cell conversion",
+        measure(lambda: _get_data_per_cell(fields, param_rows), 1, repeat=3) / 1000,
+        "ms",
+    )
+    report(
+        f"{ROWS} rows, column-wise conversion",
+        measure(lambda: _get_data(fields, param_rows), 1, repeat=3) / 1000,
+        "ms",
+    )
+
+    fields = fields[:1] + fields[2:]
+    param_rows = [[row[0], row[2]] for row in param_rows]
+    report(
+        f"{ROWS} rows without datetimes, per-cell conversion",
+        measure(lambda: _get_data_per_cell(fields, param_rows), 1, repeat=3) / 1000,
+        "ms",
+    )
+    report(
+        f"{ROWS} rows without datetimes, column-wise conversion",
+        measure(lambda: _get_data(fields, param_rows), 1, repeat=3) / 1000,
+        "ms",
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""
+Setup time and Python memory of 64 connections, as opened by the threads of
+a worker, with a driver per connection compared with the shared driver and
+session pool. Needs the local YDB of the test suite.
+
+    python -m benchmarks.bench_connect
+"""
+import time
+import tracemalloc
+
+from .common import report
+from .common import setup
+
+CONNECTIONS = 64
+
+
+def _open(connection, count):
+    params = connection.get_connection_params()
+    tracemalloc.start()
+    start = time.perf_counter()
+    handles = [connection.get_new_connection(params) for _ in range(count)]
+    duration = time.perf_counter() - start
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    for handle in handles:
+        handle.close()
+    return duration, memory
+
+
+def main():
+    setup()
+
+    from django.db import connection
+    from ydb_backend.backend.pool import session_pools
+
+    for name, shared in [("driver per connection", False), ("shared driver", True)]:
+        connection.settings_dict["OPTIONS"]["shared_session_pool"] = shared
+        duration, memory = _open(connection, CONNECTIONS)
+        report(f"{CONNECTIONS} connections, {name}, setup", duration * 1000, "ms")
+        report(
+            f"{CONNECTIONS} connections, {name}, per connection",
+            memory / CONNECTIONS / 1024,
+            "KiB",
+        )
+        session_pools.close()
+
+
+if __name__ == "__main__":
+    main()
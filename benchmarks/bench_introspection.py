@@ -0,0 +1,65 @@
+"""
+Introspection of 800 tables, as run by migrate and inspectdb: the table list,
+then the description, primary key and constraints of each table. Compares a
+describe round trip per call, made serially, with the describe cache filled
+by parallel describes. The describe round trip is simulated with a 5 ms
+sleep, so no database is needed.
+
+    python -m benchmarks.bench_introspection
+"""
+import time
+from unittest import mock
+
+from .common import report
+from .common import setup
+
+TABLES = 800
+DESCRIBE_LATENCY = 0.005
+
+
+def _table_scheme_entry(table_name):
+    time.sleep(DESCRIBE_LATENCY)
+    entry = mock.Mock(primary_key=["id"], indexes=[])
+    entry.name = table_name
+    column = mock.Mock(type="Int64")
+    column.name = "id"
+    entry.columns = [column]
+    return entry
+
+
+def _introspect(connection):
+    introspection = connection.introspection
+    start = time.perf_counter()
+    for table in introspection.get_table_list(None):
+        introspection.get_table_description(None, table.name)
+        introspection.get_primary_key_columns(None, table.name)
+        introspection.get_constraints(None, table.name)
+    return time.perf_counter() - start
+
+
+def main():
+    setup()
+
+    from django.db import connection
+    from ydb_backend.backend.describe import describe_cache
+
+    table_names = [f"table_{number}" for number in range(TABLES)]
+    options = connection.settings_dict["OPTIONS"]
+    get_table_names = mock.Mock(return_value=table_names)
+    get_describe = mock.Mock(side_effect=_table_scheme_entry)
+    with mock.patch.object(connection, "ensure_connection"), \
+            mock.patch.object(connection, "get_table_names", get_table_names), \
+            mock.patch.object(connection, "get_describe", get_describe):
+        for name, ttl, workers in [
+            ("uncached, serial", 0, 1),
+            ("cached, parallel", 300, 16),
+        ]:
+            options["describe_cache_ttl"] = ttl
+            options["describe_workers"] = workers
+            describe_cache.clear()
+            duration = _introspect(connection)
+            report(f"{TABLES} tables, {name}", duration, "s")
+
+
+if __name__ == "__main__":
+    main()
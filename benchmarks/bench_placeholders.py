@@ -0,0 +1,49 @@
+"""
+Placeholder rewriting on statements with many placeholders, compared with
+the replace-in-a-loop rewriting the compilers used before. Runs without a
+database.
+
+    python -m benchmarks.bench_placeholders
+"""
+from .common import measure
+from .common import report
+from .common import setup
+
+SIZES = [100, 1000, 10000]
+
+
+def _replace_placeholders_loop(sql):
+    placeholder_rows = []
+    counter = 1
+
+    while "%s" in sql:
+        sql = sql.replace("%s", f"$element_{counter}", 1)
+        placeholder_rows.append(f"$element_{counter}")
+        counter += 1
+
+    return sql, placeholder_rows
+
+
+def main():
+    setup()
+
+    from ydb_backend.models.sql.compiler import _replace_placeholders
+
+    for size in SIZES:
+        sql = (
+            "SELECT `t`.`id`, `t`.`name` FROM `t` "
+            f"WHERE `t`.`id` IN ({', '.join(['%s'] * size)})"
+        )
+        number = max(1, 10000 // size)
+        report(
+            f"{size} placeholders, replace loop",
+            measure(lambda sql=sql: _replace_placeholders_loop(sql), number),
+        )
+        report(
+            f"{size} placeholders, single pass",
+            measure(lambda sql=sql: _replace_placeholders(sql), number),
+        )
+
+
+if __name__ == "__main__":
+    main()
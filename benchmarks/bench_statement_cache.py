@@ -0,0 +1,42 @@
+"""
+Per-query CPU cost of SQLCompiler.as_sql() with and without the statement
+cache. Runs without a database.
+
+    python -m benchmarks.bench_statement_cache
+"""
+from .common import measure
+from .common import report
+from .common import setup
+
+NUMBER = 2000
+
+
+def main():
+    setup()
+
+    from ydb_backend.models.sql.cache import statement_cache
+
+    from compiler.models import Product
+
+    def compile_query():
+        queryset = Product.objects.filter(
+            category="books", price__gte=100, stock__lt=5
+        ).exclude(name="draft")
+        queryset.query.get_compiler("default").as_sql()
+
+    maxsize = statement_cache.maxsize
+    try:
+        statement_cache.maxsize = 0
+        statement_cache.clear()
+        report("as_sql, statement cache disabled", measure(compile_query, NUMBER))
+
+        statement_cache.maxsize = maxsize
+        statement_cache.clear()
+        report("as_sql, statement cache enabled", measure(compile_query, NUMBER))
+        print(statement_cache.info())
+    finally:
+        statement_cache.maxsize = maxsize
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Native UPSERT ... SELECT FROM AS_TABLE($in_) compared with the emulated
+SELECT + save() per object, for 1k, 10k and 100k rows. Half of the rows
+already exist. Needs the local YDB of the test suite.
+
+    python -m benchmarks.bench_upsert
+"""
+import time
+
+from .common import report
+from .common import setup
+
+SIZES = [1_000, 10_000, 100_000]
+
+
+def _tokens(model, count, owner):
+    return [
+        model(
+            contract_address="0x1a2b3c4d5e",
+            token_id=str(i),
+            owner=owner,
+            metadata_url="ipfs://QmXyZ123",
+            last_price=float(i),
+        )
+        for i in range(count)
+    ]
+
+
+def _run(func):
+    start = time.perf_counter()
+    func()
+    return (time.perf_counter() - start) * 1000
+
+
+def main():
+    setup()
+
+    from django.db import connection
+
+    from compiler.models import NFTToken
+
+    manager = NFTToken.objects
+    conflict_target = manager._get_default_conflict_target()
+    update_fields = manager._get_default_update_fields(conflict_target)
+
+    with connection.schema_editor() as editor:
+        editor.create_model(NFTToken)
+    try:
+        for size in SIZES:
+            for name, upsert in [
+                ("native", manager.get_queryset().bulk_upsert),
+                ("emulated", manager._optimized_emulated_upsert),
+            ]:
+                manager.all().delete()
+                manager.bulk_create(_tokens(NFTToken, size // 2, "0xAlice"))
+                objs = _tokens(NFTToken, size, "0xBob")
+                report(
+                    f"{size} rows, {name} upsert",
+                    _run(lambda u=upsert, o=objs: u(o, conflict_target, update_fields)),
+                    "ms",
+                )
+    finally:
+        with connection.schema_editor() as editor:
+            editor.delete_model(NFTToken)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,34 @@
+"""
+Shared setup for the benchmark scripts.
+
+Benchmarks reuse the test settings and test models, so the ones that execute
+queries need the same local YDB as the test suite (``docker compose up``).
+Compile-only benchmarks run without a database.
+"""
+import os
+import sys
+import timeit
+from pathlib import Path
+
+import django
+from django.conf import settings
+
+TESTS_DIR = Path(__file__).resolve().parent.parent / "tests"
+TEST_APPS = ["aggregates", "backends", "compiler", "type"]
+
+
+def setup():
+    sys.path.insert(0, str(TESTS_DIR))
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "settings")
+    settings.INSTALLED_APPS.extend(TEST_APPS)
+    django.setup()
+
+
+def measure(func, number, repeat=5):
+    """Return the best time of a single call of ``func`` in microseconds."""
+    timings = timeit.repeat(func, number=number, repeat=repeat)
+    return min(timings) / number * 1_000_000
+
+
+def report(name, value, unit="us"):
+    print(f"{name:<56} {value:>14.2f} {unit}")
@@ -1,4 +1,3 @@
-from django.core.paginator import Paginator
 from django.db.models import Q
 from django.shortcuts import get_object_or_404
 from django.shortcuts import redirect
@@ -7,6 +6,8 @@ from django.shortcuts import render
 from rest_framework import generics
 from rest_framework.response import Response
 from rest_framework import status
+from ydb_backend.paginator import InvalidToken
+from ydb_backend.paginator import KeysetPaginator
 
 from .forms import BookStoreForm
 from .models import BookStore
@@ -28,7 +29,7 @@ def item_list(request):
     search_query = request.GET.get("q", "").strip()
     sort_field = request.GET.get("sort", "title")
     sort_direction = request.GET.get("dir", "asc")
-    page_number = request.GET.get("page", 1)
+    page_token = request.GET.get("page")
 
     if sort_field not in ALLOWED_SORT_FIELDS:
         sort_field = "title"
@@ -46,8 +47,11 @@ def item_list(request):
 
     books = books.order_by(sort_field)
 
-    paginator = Paginator(books, 10)
-    page_obj = paginator.get_page(page_number)
+    paginator = KeysetPaginator(books, 10)
+    try:
+        page_obj = paginator.get_page(page_token)
+    except InvalidToken:
+        page_obj = paginator.get_page()
 
     return render(request, "bookstore/record_list.html", {
         "items": page_obj,
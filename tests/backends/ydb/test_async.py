@@ -0,0 +1,127 @@
+from unittest import mock
+
+from django.db import connection
+from django.test import SimpleTestCase
+from ydb_backend.backend import base
+from ydb_backend.models.sql.compiler import SQLCompiler
+
+from compiler.models import NFTToken
+
+ROW = ("0xabc", "1", "0xdef", "https://example.com/1", 1.5)
+
+
+class TestNativeAsync(SimpleTestCase):
+    databases = {"default"}
+
+    def setUp(self):
+        self.cursor = mock.Mock(truncated=False)
+        self.cursor.execute = mock.AsyncMock()
+        self.cursor.fetchall.return_value = [ROW]
+        async_connection = mock.Mock()
+        async_connection.cursor.return_value = self.cursor
+        self.pool = mock.Mock()
+        for name, target in [
+            ("aget", mock.patch.object(base.session_pools, "aget")),
+            ("async_connect", mock.patch.object(base.Database, "async_connect")),
+        ]:
+            setattr(self, name, target.start())
+            self.addCleanup(target.stop)
+        self.aget.return_value = self.pool
+        self.async_connect.return_value = async_connection
+        options = {**connection.settings_dict["OPTIONS"], "native_async": True}
+        patcher = mock.patch.dict(connection.settings_dict, {"OPTIONS": options})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def test_iteration(self):
+        tokens = [token async for token in NFTToken.objects.filter(owner="0xdef")]
+
+        self.assertEqual([token.pk for token in tokens], ["1"])
+        self.assertEqual(tokens[0].last_price, 1.5)
+        sql, params = self.cursor.execute.call_args.args
+        self.assertIn("WHERE", sql)
+        self.assertEqual(params["$element_1"][0], "0xdef")
+        self.cursor.close.assert_called_once_with()
+
+    async def test_get(self):
+        token = await NFTToken.objects.aget(pk="1")
+
+        self.assertEqual(token.owner, "0xdef")
+        self.assertEqual(self.cursor.execute.call_count, 1)
+        self.assertIs(
+            self.async_connect.call_args.kwargs["ydb_session_pool"], self.pool
+        )
+
+    async def test_get_does_not_exist(self):
+        self.cursor.fetchall.return_value = []
+
+        with self.assertRaises(NFTToken.DoesNotExist):
+            await NFTToken.objects.aget(pk="2")
+
+    async def test_first_last(self):
+        token = await NFTToken.objects.afirst()
+        self.assertEqual(token.pk, "1")
+        self.assertIn("ORDER BY", self.cursor.execute.call_args.args[0])
+
+        self.cursor.fetchall.return_value = []
+        self.assertIsNone(await NFTToken.objects.filter(owner="0x0").alast())
+        self.assertEqual(self.cursor.execute.call_count, 2)
+
+    async def test_queryset_evaluated_once(self):
+        queryset = NFTToken.objects.filter(owner="0xdef")
+        with mock.patch.object(
+            type(queryset), "_fetch_all", autospec=True,
+            side_effect=type(queryset)._fetch_all,
+        ) as fetch_all, mock.patch(
+            "ydb_backend.models.sql.compiler.SQLCompiler.as_sql", autospec=True,
+            side_effect=SQLCompiler.as_sql,
+        ) as as_sql:
+            tokens = [token async for token in queryset]
+
+        self.assertEqual(len(tokens), 1)
+        fetch_all.assert_called_once_with(queryset)
+        self.assertEqual(as_sql.call_count, 1)
+
+    async def test_other_methods_use_thread(self):
+        sync_to_async = mock.Mock(return_value=mock.AsyncMock(return_value=3))
+        with mock.patch("django.db.models.query.sync_to_async", sync_to_async):
+            self.assertEqual(await NFTToken.objects.acount(), 3)
+        self.cursor.execute.assert_not_called()
+
+    async def test_empty_result_set(self):
+        tokens = [token async for token in NFTToken.objects.filter(pk__in=[])]
+
+        self.assertEqual(tokens, [])
+        self.cursor.execute.assert_not_called()
+
+    async def test_prefetch_related_uses_thread(self):
+        sync_to_async = mock.Mock(return_value=mock.AsyncMock())
+        with mock.patch("ydb_backend.models.sql.aio.sync_to_async", sync_to_async):
+            await NFTToken.objects.prefetch_related("owner").afirst()
+        self.cursor.execute.assert_not_called()
+        sync_to_async.assert_called_once()
+
+    async def test_tx_mode(self):
+        await NFTToken.objects.ydb_tx_mode("snapshot_ro").aget(pk="1")
+
+        self.assertIsInstance(self.cursor._tx_mode, type(base.TX_MODES["snapshot_ro"]))
+        self.assertEqual(connection.ydb_tx_modes, [])
+
+    async def test_thread_by_default(self):
+        sync_to_async = mock.Mock(return_value=mock.AsyncMock())
+        options = {**connection.settings_dict["OPTIONS"]}
+        options.pop("native_async", None)
+        with mock.patch.dict(connection.settings_dict, {"OPTIONS": options}), \
+                mock.patch("ydb_backend.models.sql.aio.sync_to_async", sync_to_async):
+            await NFTToken.objects.afirst()
+        sync_to_async.assert_called_once()
+        self.cursor.execute.assert_not_called()
+        self.async_connect.assert_not_called()
+
+    async def test_truncated_result_falls_back_to_thread(self):
+        self.cursor.truncated = True
+        sync_to_async = mock.Mock(return_value=mock.AsyncMock(return_value=[]))
+        with mock.patch("ydb_backend.models.sql.aio.sync_to_async", sync_to_async):
+            await NFTToken.objects.all().afirst()
+        self.assertEqual(self.cursor.execute.call_count, 1)
+        sync_to_async.assert_called_once()
@@ -1,5 +1,13 @@
+import time
+from unittest import mock
+
+import ydb
+from django.db import NotSupportedError
 from django.db import connection
 from django.test import SimpleTestCase
+from ydb_backend.backend.base import Cursor
+from ydb_backend.backend.probes import ServerProbes
+from ydb_backend.backend.probes import server_probes
 
 
 class TestDatabaseWrapper(SimpleTestCase):
@@ -31,3 +39,115 @@ class TestDatabaseWrapper(SimpleTestCase):
 
     def test_is_usable(self):
         self.assertTrue(connection.is_usable())
+
+
+class TestIsUsable(SimpleTestCase):
+    databases = {"default"}
+
+    def setUp(self):
+        self.raw_connection = mock.Mock(last_success=time.monotonic())
+        self.raw_cursor = self.raw_connection.cursor.return_value
+        self.raw_cursor.__enter__ = mock.Mock(return_value=self.raw_cursor)
+        self.raw_cursor.__exit__ = mock.Mock(return_value=False)
+        self.raw_cursor.rowcount = 1
+        patcher = mock.patch.object(connection, "connection", self.raw_connection)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_recent_success(self):
+        self.assertTrue(connection.is_usable())
+        self.raw_connection._driver.wait.assert_called_once_with(0, fail_fast=True)
+        self.raw_cursor.execute.assert_not_called()
+
+    def test_idle_connection_is_probed(self):
+        self.raw_connection.last_success -= 60
+
+        self.assertTrue(connection.is_usable())
+        self.raw_cursor.execute.assert_called_once_with("SELECT 1")
+
+    def test_connection_with_errors_is_probed(self):
+        with mock.patch.object(connection, "errors_occurred", True):
+            self.assertTrue(connection.is_usable())
+        self.raw_cursor.execute.assert_called_once_with("SELECT 1")
+
+    def test_no_endpoint(self):
+        self.raw_connection._driver.wait.side_effect = ydb.issues.ConnectionError(
+            "error"
+        )
+
+        self.assertFalse(connection.is_usable())
+        self.raw_cursor.execute.assert_not_called()
+
+    def test_failed_probe(self):
+        self.raw_connection.last_success -= 60
+        self.raw_cursor.execute.side_effect = connection.Database.OperationalError(
+            "error"
+        )
+
+        self.assertFalse(connection.is_usable())
+
+    def test_cursor_records_success(self):
+        raw_connection = mock.Mock(last_success=0)
+        cursor = Cursor(
+            connection=raw_connection,
+            session_pool=None,
+            tx_mode=None,
+            request_settings=None,
+            retry_settings=None,
+        )
+        cursor._fill_buffer([])
+
+        self.assertGreater(raw_connection.last_success, 0)
+
+
+class TestServerProbes(SimpleTestCase):
+    databases = {"default"}
+
+    def setUp(self):
+        server_probes.clear()
+        self.addCleanup(server_probes.clear)
+        self.raw_connection = mock.Mock()
+        self.raw_cursor = self.raw_connection.cursor.return_value
+        self.raw_cursor.__enter__ = mock.Mock(return_value=self.raw_cursor)
+        self.raw_cursor.__exit__ = mock.Mock(return_value=False)
+        self.raw_cursor.fetchone.return_value = (b"24.1.10-abc",)
+        patcher = mock.patch.object(connection, "connection", self.raw_connection)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_probe_ttl(self):
+        probes = ServerProbes()
+        probe = mock.Mock(side_effect=[1, 2])
+
+        self.assertEqual(probes.get("endpoint", "probe", probe, ttl=60), 1)
+        self.assertEqual(probes.get("endpoint", "probe", probe, ttl=60), 1)
+        with mock.patch("time.monotonic", return_value=time.monotonic() + 61):
+            self.assertEqual(probes.get("endpoint", "probe", probe, ttl=60), 2)
+        self.assertEqual(probes.get("other", "probe", mock.Mock(return_value=3)), 3)
+
+    def test_failed_probe_is_not_cached(self):
+        probes = ServerProbes()
+        probe = mock.Mock(side_effect=[ValueError, 1])
+
+        with self.assertRaises(ValueError):
+            probes.get("endpoint", "probe", probe)
+        self.assertEqual(probes.get("endpoint", "probe", probe), 1)
+
+    def test_version_is_queried_once(self):
+        self.assertEqual(connection.get_database_version(), (24, 1, 10))
+        connection.check_database_version_supported()
+        self.assertEqual(connection.get_database_version(), (24, 1, 10))
+
+        self.raw_cursor.execute.assert_called_once_with("SELECT version()")
+
+    def test_unsupported_version(self):
+        self.raw_cursor.fetchone.return_value = (b"19.4.1",)
+
+        with self.assertRaisesMessage(NotSupportedError, "YDB 20 or later"):
+            connection.check_database_version_supported()
+
+    def test_main_version(self):
+        self.raw_cursor.fetchone.return_value = (b"main",)
+
+        connection.check_database_version_supported()
+        self.assertEqual(connection.get_database_version(), ("main",))
@@ -1,7 +1,21 @@
+import json
+import tempfile
+import threading
+import time
+from pathlib import Path
+from unittest import mock
+
 from django.db import connection
+from django.db.models.signals import post_migrate
+from django.db.models.signals import pre_migrate
+from django.test import SimpleTestCase
 from django.test import TestCase
+from ydb_backend.backend import introspection
+from ydb_backend.backend.describe import DescribeCache
+from ydb_backend.backend.describe import to_table_description
 from ydb_backend.backend.introspection import FieldInfo
 from ydb_backend.backend.introspection import TableInfo
+from ydb_backend.backend.schema import _get_altered_tables
 
 
 class TestDatabaseIntrospection(TestCase):
@@ -160,3 +174,242 @@ class TestDatabaseIntrospection(TestCase):
             )
 
         self.assertEqual(["id"], result)
+
+    def test_get_table_row_estimate(self):
+        with connection.cursor() as cursor:
+            result = connection.introspection.get_table_row_estimate(
+                cursor, "backends_person"
+            )
+
+        self.assertIsInstance(result, (int, type(None)))
+
+
+def _named(name, **kwargs):
+    # The name argument of Mock() names the mock itself.
+    named = mock.Mock(**kwargs)
+    named.name = name
+    return named
+
+
+def _table_scheme_entry(name):
+    return _named(
+        name,
+        columns=[_named("id", type="Int32"), _named("title", type="Utf8?")],
+        primary_key=["id"],
+        indexes=[_named("title_idx", index_columns=["title"])],
+    )
+
+
+DATABASE = ("localhost", "2136", "/local", "")
+
+
+class TestDescribeCache(SimpleTestCase):
+    def setUp(self):
+        self.cache = DescribeCache()
+        self.threads = set()
+
+    def describe(self, table_name):
+        self.threads.add(threading.get_ident())
+        return to_table_description(_table_scheme_entry(table_name))
+
+    def test_tables_are_described_once(self):
+        describe = mock.Mock(side_effect=self.describe)
+        names = [f"table_{number}" for number in range(8)]
+
+        descriptions = self.cache.get_many(DATABASE, names, describe, workers=4)
+        self.assertEqual(list(descriptions), names)
+        self.assertEqual(descriptions["table_1"].columns[1].type, "Utf8?")
+        self.assertGreater(len(self.threads), 1)
+
+        self.cache.get(DATABASE, "table_1", describe)
+        self.assertEqual(describe.call_count, 8)
+
+    def test_descriptions_expire(self):
+        describe = mock.Mock(side_effect=self.describe)
+        self.cache.get(DATABASE, "table", describe, ttl=10)
+        with mock.patch("time.time", return_value=time.time() + 11):
+            self.cache.get(DATABASE, "table", describe, ttl=10)
+        self.cache.get(DATABASE, "other", describe, ttl=0)
+        self.cache.get(DATABASE, "other", describe, ttl=0)
+
+        self.assertEqual(describe.call_count, 4)
+
+    def test_invalidate(self):
+        describe = mock.Mock(side_effect=self.describe)
+        self.cache.get_many(DATABASE, ["a", "b"], describe)
+        self.cache.invalidate(DATABASE, {"a"})
+        self.cache.get_many(DATABASE, ["a", "b"], describe)
+        self.assertEqual(describe.call_count, 3)
+
+        self.cache.invalidate(DATABASE)
+        self.cache.get_many(DATABASE, ["a", "b"], describe)
+        self.assertEqual(describe.call_count, 5)
+
+    def test_description_fetched_during_invalidation_is_not_cached(self):
+        def describe(table_name):
+            self.cache.invalidate(DATABASE, {table_name})
+            return self.describe(table_name)
+
+        self.cache.get(DATABASE, "table", describe)
+        self.assertEqual(self.cache._entries, {})
+
+    def test_snapshot(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / "describe.json"
+            self.cache.get_many(DATABASE, ["a", "b"], self.describe)
+            self.cache.save(DATABASE, path)
+
+            cache = DescribeCache()
+            describe = mock.Mock(side_effect=self.describe)
+            cache.load(DATABASE, path)
+            descriptions = cache.get_many(DATABASE, ["a", "b"], describe)
+            self.assertEqual(describe.call_count, 0)
+            self.assertEqual(descriptions["a"], self.describe("a"))
+
+            other = DescribeCache()
+            other.load(("other", *DATABASE[1:]), path)
+            with mock.patch("time.time", return_value=time.time() + 301):
+                other.load(DATABASE, path)
+            self.assertEqual(other._entries, {})
+
+    def test_unreadable_snapshot_is_ignored(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / "describe.json"
+            with path.open("w") as file:
+                file.write("{")
+            with self.assertLogs("django_ydb_backend.backend.describe", "WARNING"):
+                self.cache.load(DATABASE, path)
+        self.assertEqual(self.cache._entries, {})
+
+
+class TestIntrospectionCache(SimpleTestCase):
+    databases = {"default"}
+
+    def setUp(self):
+        self.get_describe = mock.Mock(side_effect=_table_scheme_entry)
+        for target, name, value in [
+            (connection, "ensure_connection", mock.Mock()),
+            (connection, "get_describe", self.get_describe),
+            (connection, "get_table_names", mock.Mock(return_value=["a", "b"])),
+            (introspection, "describe_cache", DescribeCache()),
+        ]:
+            patcher = mock.patch.object(target, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        options = {**connection.settings_dict["OPTIONS"], "describe_cache_ttl": 300}
+        patcher = mock.patch.dict(connection.settings_dict, {"OPTIONS": options})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_not_cached_by_default(self):
+        options = {**connection.settings_dict["OPTIONS"]}
+        options.pop("describe_cache_ttl")
+        with mock.patch.dict(connection.settings_dict, {"OPTIONS": options}):
+            connection.introspection.get_primary_key_columns(None, "a")
+            connection.introspection.get_primary_key_columns(None, "a")
+        self.assertEqual(self.get_describe.call_count, 2)
+
+    def test_methods_share_descriptions(self):
+        introspection = connection.introspection
+
+        self.assertEqual(
+            sorted(info.name for info in introspection.get_table_list(None)),
+            ["a", "b"],
+        )
+        self.assertEqual(introspection.get_primary_key_columns(None, "a"), ["id"])
+        self.assertEqual(
+            introspection.get_constraints(None, "a")["title_idx"]["columns"],
+            ["title"],
+        )
+        self.assertEqual(
+            [info.type_code for info in introspection.get_table_description(None, "b")],
+            ["Int32", "Utf8?"],
+        )
+        self.assertEqual(self.get_describe.call_count, 2)
+
+    def test_schema_editor_invalidates_descriptions(self):
+        introspection = connection.introspection
+        introspection.get_table_list(None)
+
+        with mock.patch.object(connection, "cursor"), \
+                connection.schema_editor(atomic=False) as editor:
+            editor.execute("ALTER TABLE `a` ADD COLUMN `b` Utf8;")
+        introspection.get_table_list(None)
+        self.assertEqual(self.get_describe.call_count, 3)
+
+        with mock.patch.object(connection, "cursor"), \
+                connection.schema_editor(atomic=False) as editor:
+            editor.execute("GRANT ALL ON `/local` TO user;")
+        introspection.get_table_list(None)
+        self.assertEqual(self.get_describe.call_count, 5)
+
+    def test_snapshot(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / "describe.json"
+            options = {**connection.settings_dict["OPTIONS"], "describe_snapshot": path}
+            with mock.patch.dict(connection.settings_dict, {"OPTIONS": options}):
+                connection.introspection.get_table_list(None)
+
+                with mock.patch.object(
+                    introspection, "describe_cache", DescribeCache()
+                ):
+                    connection.introspection.get_table_list(None)
+                    self.assertEqual(self.get_describe.call_count, 2)
+
+                    connection.introspection.invalidate_descriptions({"a"})
+                    with path.open() as file:
+                        self.assertEqual(list(json.load(file)["tables"]), ["b"])
+
+    def test_migrate_signals_skip_snapshot(self):
+        self.addCleanup(
+            setattr, connection.introspection, "use_describe_snapshot", True
+        )
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / "describe.json"
+            options = {**connection.settings_dict["OPTIONS"], "describe_snapshot": path}
+            with mock.patch.dict(connection.settings_dict, {"OPTIONS": options}):
+                connection.introspection.get_table_list(None)
+
+                for signal in [pre_migrate, post_migrate]:
+                    connection.introspection.use_describe_snapshot = True
+                    with self.subTest(signal=signal), mock.patch.object(
+                        introspection, "describe_cache", DescribeCache()
+                    ):
+                        signal.send(
+                            sender=None, app_config=None, verbosity=0,
+                            interactive=False, using=connection.alias,
+                        )
+                        connection.introspection.get_table_list(None)
+                self.assertEqual(self.get_describe.call_count, 6)
+
+    def test_schema_editor_skips_snapshot(self):
+        self.addCleanup(
+            setattr, connection.introspection, "use_describe_snapshot", True
+        )
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / "describe.json"
+            options = {**connection.settings_dict["OPTIONS"], "describe_snapshot": path}
+            with mock.patch.dict(connection.settings_dict, {"OPTIONS": options}):
+                connection.introspection.get_table_list(None)
+
+                with mock.patch.object(
+                    introspection, "describe_cache", DescribeCache()
+                ):
+                    with connection.schema_editor(collect_sql=True):
+                        pass
+                    connection.introspection.get_table_list(None)
+                    self.assertEqual(self.get_describe.call_count, 4)
+                    # The snapshot now holds the new descriptions.
+                    with path.open() as file:
+                        self.assertEqual(
+                            sorted(json.load(file)["tables"]), ["a", "b"]
+                        )
+
+
+class TestAlteredTables(SimpleTestCase):
+    def test_get_altered_tables(self):
+        self.assertEqual(
+            _get_altered_tables("ALTER TABLE `old` RENAME TO `new`;"), {"old", "new"}
+        )
+        self.assertEqual(_get_altered_tables("DROP TABLE `t`;"), {"t"})
+        self.assertIsNone(_get_altered_tables("SELECT 1"))
@@ -0,0 +1,178 @@
+import asyncio
+import threading
+from unittest import mock
+
+from django.db import connection
+from django.test import SimpleTestCase
+from ydb_backend.backend import base
+from ydb_backend.backend.pool import SessionPoolRegistry
+
+CONN_PARAMS = {
+    "host": "localhost",
+    "port": "2136",
+    "database": "/local",
+    "credentials": None,
+    "root_certificates": "certificates",
+}
+
+
+class TestSessionPoolRegistry(SimpleTestCase):
+    def setUp(self):
+        for name in ["Driver", "DriverConfig", "QuerySessionPool"]:
+            patcher = mock.patch(f"ydb.{name}")
+            setattr(self, name, patcher.start())
+            self.addCleanup(patcher.stop)
+        self.Driver.side_effect = lambda config: mock.Mock()
+        self.QuerySessionPool.side_effect = lambda driver, size: mock.Mock(
+            driver=driver, size=size
+        )
+        self.registry = SessionPoolRegistry()
+
+    def test_pool_is_shared(self):
+        pool = self.registry.get(CONN_PARAMS, size=10)
+
+        self.assertIs(self.registry.get(dict(CONN_PARAMS), size=10), pool)
+        self.assertEqual(pool.size, 10)
+        self.assertEqual(self.Driver.call_count, 1)
+        pool.driver.wait.assert_called_once_with(10, fail_fast=True)
+        config = self.DriverConfig.call_args.kwargs
+        self.assertEqual(config["endpoint"], "grpc://localhost:2136")
+        self.assertEqual(config["database"], "/local")
+        self.assertEqual(config["root_certificates"], "certificates")
+
+    def test_pool_per_params(self):
+        pool = self.registry.get(CONN_PARAMS)
+
+        self.assertIsNot(self.registry.get({**CONN_PARAMS, "port": "2137"}), pool)
+        self.assertIsNot(self.registry.get(CONN_PARAMS, size=10), pool)
+        self.assertEqual(len(self.registry), 3)
+
+    def test_driver_is_not_awaited_under_registry_lock(self):
+        ready = threading.Event()
+        waiting = threading.Event()
+
+        def wait(timeout, fail_fast):
+            waiting.set()
+            ready.wait(5)
+
+        slow_driver = mock.Mock()
+        slow_driver.wait.side_effect = wait
+        self.Driver.side_effect = [slow_driver, mock.Mock()]
+        pools = []
+
+        def get():
+            pools.append(self.registry.get(CONN_PARAMS))
+
+        threads = [threading.Thread(target=get) for _ in range(2)]
+        threads[0].start()
+        waiting.wait(5)
+        threads[1].start()
+
+        # Another database gets its pool while the first driver connects.
+        other = self.registry.get({**CONN_PARAMS, "port": "2137"})
+        self.assertTrue(threads[0].is_alive())
+        ready.set()
+        for thread in threads:
+            thread.join(5)
+
+        self.assertIsNot(other.driver, slow_driver)
+        self.assertEqual(len(pools), 2)
+        self.assertIs(pools[0], pools[1])
+        self.assertIs(pools[0].driver, slow_driver)
+        self.assertEqual(self.Driver.call_count, 2)
+
+    def test_pools_are_not_shared_after_fork(self):
+        pool = self.registry.get(CONN_PARAMS)
+
+        with mock.patch("os.getpid", return_value=-1):
+            self.assertIsNot(self.registry.get(CONN_PARAMS), pool)
+        pool.stop.assert_not_called()
+
+    def test_driver_is_stopped_if_not_ready(self):
+        driver = mock.Mock()
+        driver.wait.side_effect = TimeoutError
+        self.Driver.side_effect = None
+        self.Driver.return_value = driver
+
+        with self.assertRaises(TimeoutError):
+            self.registry.get(CONN_PARAMS)
+        driver.stop.assert_called_once_with()
+        self.assertEqual(len(self.registry), 0)
+
+    def test_close(self):
+        pool = self.registry.get(CONN_PARAMS)
+        self.registry.close()
+
+        pool.stop.assert_called_once_with()
+        pool.driver.stop.assert_called_once_with()
+        self.assertEqual(len(self.registry), 0)
+
+
+class TestAsyncSessionPoolRegistry(SimpleTestCase):
+    def setUp(self):
+        for name in ["Driver", "QuerySessionPool"]:
+            patcher = mock.patch(f"ydb.aio.{name}")
+            setattr(self, name, patcher.start())
+            self.addCleanup(patcher.stop)
+        patcher = mock.patch("ydb.DriverConfig")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.Driver.side_effect = lambda config: mock.AsyncMock()
+        self.QuerySessionPool.side_effect = lambda driver, size: mock.AsyncMock(
+            driver=driver, size=size
+        )
+        self.registry = SessionPoolRegistry()
+
+    async def test_pool_is_shared_in_loop(self):
+        pools = await asyncio.gather(
+            self.registry.aget(CONN_PARAMS), self.registry.aget(CONN_PARAMS)
+        )
+
+        self.assertIs(pools[0], pools[1])
+        self.assertEqual(self.Driver.call_count, 1)
+        pools[0].driver.wait.assert_awaited_once_with(10, fail_fast=True)
+
+        await self.registry.aclose()
+        pools[0].stop.assert_awaited_once_with()
+        pools[0].driver.stop.assert_awaited_once_with()
+        self.assertEqual(len(self.registry), 0)
+
+    async def test_failed_pool_is_not_kept(self):
+        driver = mock.AsyncMock()
+        driver.wait.side_effect = TimeoutError
+        self.Driver.side_effect = None
+        self.Driver.return_value = driver
+
+        with self.assertRaises(TimeoutError):
+            await self.registry.aget(CONN_PARAMS)
+        driver.stop.assert_awaited_once_with()
+        self.assertEqual(len(self.registry), 0)
+
+
+class TestSharedConnection(SimpleTestCase):
+    databases = {"default"}
+
+    def test_connection_uses_shared_pool(self):
+        pool = mock.Mock()
+        with mock.patch.object(base.session_pools, "get", return_value=pool) as get, \
+                mock.patch.object(base.Database, "connect") as connect:
+            connection.get_new_connection(CONN_PARAMS)
+
+        get.assert_called_once_with(CONN_PARAMS, size=100)
+        connect.assert_called_once_with(
+            host="localhost",
+            port="2136",
+            database="/local",
+            credentials=None,
+            ydb_session_pool=pool,
+        )
+
+    def test_shared_pool_option(self):
+        options = {**connection.settings_dict["OPTIONS"], "shared_session_pool": False}
+        with mock.patch.dict(connection.settings_dict, {"OPTIONS": options}), \
+                mock.patch.object(base.session_pools, "get") as get, \
+                mock.patch.object(base.Database, "connect") as connect:
+            connection.get_new_connection(CONN_PARAMS)
+
+        get.assert_not_called()
+        connect.assert_called_once_with(**CONN_PARAMS)
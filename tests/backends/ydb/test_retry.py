@@ -0,0 +1,272 @@
+from unittest import mock
+
+import ydb
+import ydb_dbapi
+from django.db import connection
+from django.db import transaction
+from django.db.utils import OperationalError
+from django.db.utils import ProgrammingError
+from django.test import SimpleTestCase
+from ydb_backend.backend.base import Cursor
+from ydb_backend.retry import FAST_BACKOFF
+from ydb_backend.retry import NO_DRIVER_RETRIES
+from ydb_backend.retry import SLOW_BACKOFF
+from ydb_backend.retry import RetryBudget
+from ydb_backend.retry import get_backoff
+from ydb_backend.retry import ydb_atomic
+from ydb_backend.retry import ydb_retry
+from ydb_backend.signals import retry_attempted
+from ydb_backend.signals import retry_finished
+
+from compiler.models import NFTToken
+
+
+def _raise_dbapi_error(ydb_error):
+    raise ydb_dbapi.OperationalError("error", original_error=ydb_error)
+
+
+def _error(ydb_error_class):
+    """Return the Django error raised for a YDB driver error."""
+    try:
+        try:
+            _raise_dbapi_error(ydb_error_class("error"))
+        except ydb_dbapi.OperationalError as e:
+            raise OperationalError(*e.args) from e
+    except OperationalError as e:
+        return e
+
+
+class TestRetry(SimpleTestCase):
+    databases = {"default"}
+
+    def setUp(self):
+        patcher = mock.patch("ydb_backend.retry.time.sleep")
+        self.sleep = patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = mock.patch("ydb_backend.retry.retry_budget", RetryBudget())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.attempts = []
+        self.finished = []
+
+        def on_attempt(sender, **kwargs):
+            self.attempts.append(kwargs["attempt"])
+
+        def on_finished(sender, **kwargs):
+            self.finished.append((kwargs["attempts"], kwargs["error"]))
+
+        self.on_attempt = on_attempt
+        self.on_finished = on_finished
+        retry_attempted.connect(self.on_attempt)
+        retry_finished.connect(self.on_finished)
+        self.addCleanup(retry_attempted.disconnect, self.on_attempt)
+        self.addCleanup(retry_finished.disconnect, self.on_finished)
+
+    def _failing(self, *errors, result="done"):
+        func = mock.Mock(side_effect=[*errors, result])
+        func.__qualname__ = "func"
+        return func
+
+    def test_get_backoff(self):
+        self.assertIs(get_backoff(_error(ydb.issues.Aborted)), SLOW_BACKOFF)
+        self.assertIs(get_backoff(_error(ydb.issues.Overloaded)), SLOW_BACKOFF)
+        self.assertIs(get_backoff(_error(ydb.issues.Unavailable)), FAST_BACKOFF)
+        self.assertIs(get_backoff(_error(ydb.issues.SessionBusy)), FAST_BACKOFF)
+        self.assertIsNone(get_backoff(_error(ydb.issues.Undetermined)))
+        self.assertIs(
+            get_backoff(_error(ydb.issues.Undetermined), idempotent=True),
+            SLOW_BACKOFF,
+        )
+        self.assertIsNone(get_backoff(_error(ydb.issues.SchemeError)))
+        self.assertIsNone(get_backoff(ProgrammingError("error")))
+
+    def test_retries_until_success(self):
+        func = self._failing(
+            _error(ydb.issues.Aborted), _error(ydb.issues.Unavailable)
+        )
+
+        self.assertEqual(ydb_retry(func)(1, key="value"), "done")
+        func.assert_called_with(1, key="value")
+        self.assertEqual(func.call_count, 3)
+        self.assertEqual(self.attempts, [1, 2])
+        self.assertEqual(self.finished, [(3, None)])
+        self.assertEqual(self.sleep.call_count, 2)
+
+    def test_backoff_grows(self):
+        errors = [_error(ydb.issues.Overloaded)] * 3
+        ydb_retry(self._failing(*errors))()
+
+        delays = [call.args[0] for call in self.sleep.call_args_list]
+        for attempt, delay in enumerate(delays):
+            maximum = SLOW_BACKOFF.slot * 2 ** attempt
+            self.assertGreaterEqual(delay, maximum / 2)
+            self.assertLessEqual(delay, maximum)
+
+    def test_not_retryable(self):
+        error = _error(ydb.issues.SchemeError)
+        func = self._failing(error)
+
+        with self.assertRaises(OperationalError):
+            ydb_retry(func)()
+        self.assertEqual(func.call_count, 1)
+        self.assertEqual(self.finished, [(1, error)])
+
+    def test_idempotent(self):
+        errors = [_error(ydb.issues.Undetermined)]
+
+        with self.assertRaises(OperationalError):
+            ydb_retry(self._failing(*errors))()
+        self.assertEqual(ydb_retry(idempotent=True)(self._failing(*errors))(), "done")
+
+    def test_max_retries(self):
+        func = self._failing(*[_error(ydb.issues.Aborted)] * 3)
+
+        with self.assertRaises(OperationalError):
+            ydb_retry(max_retries=2)(func)()
+        self.assertEqual(func.call_count, 3)
+
+    def test_budget(self):
+        budget = RetryBudget(ratio=0.5, capacity=1)
+        with mock.patch("ydb_backend.retry.retry_budget", budget):
+            func = self._failing(*[_error(ydb.issues.Aborted)] * 3)
+            with self.assertRaises(OperationalError):
+                ydb_retry(func)()
+
+        self.assertEqual(func.call_count, 2)
+
+    def test_nested_call_is_retried_by_outer_call(self):
+        inner = self._failing(_error(ydb.issues.Aborted))
+        outer = self._failing(result=None)
+        outer.side_effect = lambda: ydb_retry(inner)()
+
+        self.assertEqual(ydb_retry(outer)(), "done")
+        self.assertEqual(outer.call_count, 2)
+        self.assertEqual(inner.call_count, 2)
+        self.assertEqual(self.finished, [(2, None)])
+
+
+class TestRetryAtomic(SimpleTestCase):
+    databases = {"default"}
+
+    def setUp(self):
+        patcher = mock.patch("ydb_backend.retry.time.sleep")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.raw_connection = mock.Mock()
+        for name, value in [
+            ("connection", self.raw_connection),
+            ("autocommit", True),
+        ]:
+            patcher = mock.patch.object(connection, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _execute(self):
+        """
+        Return the retry settings of the statements executed on backend
+        cursors, whose ydb_dbapi execute() doesn't reach the database.
+        """
+        retry_settings = []
+
+        def execute(cursor, query, parameters=None):
+            retry_settings.append(cursor._retry_settings)
+
+        patcher = mock.patch.object(
+            ydb_dbapi.Cursor, "execute", autospec=True, side_effect=execute
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        raw_cursor = Cursor.__new__(Cursor)
+        raw_cursor._connection = self.raw_connection
+        self.raw_connection.cursor.return_value = raw_cursor
+        return retry_settings
+
+    def test_atomic_block_is_retried(self):
+        blocks = []
+
+        @ydb_atomic
+        def update():
+            blocks.append(connection.in_atomic_block)
+            if len(blocks) == 1:
+                raise _error(ydb.issues.Aborted)
+            return "done"
+
+        self.assertEqual(update(), "done")
+        self.assertEqual(blocks, [True, True])
+        self.assertEqual(self.raw_connection.commit.call_count, 1)
+
+    def test_block_that_read_is_retried(self):
+        self._execute()
+        blocks = []
+
+        @ydb_atomic
+        def read():
+            connection.cursor().execute("DECLARE $id AS Utf8; SELECT 1")
+            blocks.append(1)
+            if len(blocks) == 1:
+                raise _error(ydb.issues.Aborted)
+
+        read()
+        self.assertEqual(len(blocks), 2)
+
+    def test_block_that_wrote_is_retried_if_idempotent(self):
+        self._execute()
+        blocks = []
+
+        def write():
+            connection.cursor().execute("UPSERT INTO `t` (`id`) VALUES (1)")
+            blocks.append(1)
+            if len(blocks) == 1:
+                raise _error(ydb.issues.Aborted)
+
+        with self.assertRaises(OperationalError):
+            ydb_atomic(write)()
+        self.assertEqual(len(blocks), 1)
+
+        blocks.clear()
+        ydb_atomic(idempotent=True)(write)()
+        self.assertEqual(len(blocks), 2)
+
+    def test_driver_does_not_retry_within_block(self):
+        retry_settings = self._execute()
+
+        ydb_atomic(lambda: connection.cursor().execute("SELECT 1"))()
+        connection.cursor().execute("SELECT 1")
+
+        self.assertEqual(
+            retry_settings,
+            [NO_DRIVER_RETRIES, self.raw_connection.retry_settings],
+        )
+
+    def test_nested_block_is_not_retried(self):
+        func = mock.Mock(side_effect=_error(ydb.issues.Aborted))
+        func.__qualname__ = "func"
+
+        with self.assertRaises(OperationalError), transaction.atomic():
+            ydb_atomic(func)()
+        self.assertEqual(func.call_count, 1)
+
+    def test_retry_reads(self):
+        raw_cursor = mock.Mock(truncated=False)
+        raw_cursor.execute.side_effect = [
+            ydb_dbapi.OperationalError(
+                "error", original_error=ydb.issues.Unavailable("error")
+            ),
+            None,
+        ]
+        raw_cursor.fetchall.return_value = []
+        self.raw_connection.cursor.return_value = raw_cursor
+
+        options = {**connection.settings_dict["OPTIONS"], "retry_reads": True}
+        with mock.patch.dict(connection.settings_dict, {"OPTIONS": options}):
+            self.assertEqual(list(NFTToken.objects.all()), [])
+        self.assertEqual(raw_cursor.execute.call_count, 2)
+
+        raw_cursor.execute.side_effect = ydb_dbapi.OperationalError(
+            "error", original_error=ydb.issues.Unavailable("error")
+        )
+        with self.assertRaises(OperationalError):
+            list(NFTToken.objects.all())
+        self.assertEqual(raw_cursor.execute.call_count, 3)
@@ -0,0 +1,113 @@
+from unittest import mock
+
+import ydb
+from django.db import connection
+from django.db.models import Count
+from django.http import HttpResponse
+from django.test import RequestFactory
+from django.test import SimpleTestCase
+from ydb_backend.middleware import ReadOnlyTransactionMiddleware
+from ydb_backend.middleware import read_only_view
+from ydb_backend.transaction import ydb_tx_mode
+
+from compiler.models import NFTToken
+
+
+class TestTxMode(SimpleTestCase):
+    databases = {"default"}
+
+    def setUp(self):
+        self.raw_cursors = []
+
+        def cursor():
+            raw_cursor = mock.Mock(truncated=False, _tx_mode=None)
+            raw_cursor.fetchall.return_value = []
+            raw_cursor.fetchone.return_value = (0,)
+            self.raw_cursors.append(raw_cursor)
+            return raw_cursor
+
+        patcher = mock.patch.object(
+            connection, "connection", mock.Mock(cursor=cursor)
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_cursor_mode(self):
+        with ydb_tx_mode("stale_ro"), connection.cursor():
+            pass
+        with connection.cursor():
+            pass
+
+        self.assertIsInstance(self.raw_cursors[0]._tx_mode, ydb.QueryStaleReadOnly)
+        self.assertIsNone(self.raw_cursors[1]._tx_mode)
+
+    def test_nested_modes(self):
+        with ydb_tx_mode("online_ro"):
+            with ydb_tx_mode("snapshot_ro"):
+                self.assertEqual(connection.ydb_tx_modes, ["online_ro", "snapshot_ro"])
+            self.assertEqual(connection.ydb_tx_modes, ["online_ro"])
+        self.assertEqual(connection.ydb_tx_modes, [])
+
+    def test_decorator(self):
+        @ydb_tx_mode("snapshot_ro")
+        def read():
+            return list(connection.ydb_tx_modes)
+
+        self.assertEqual(read(), ["snapshot_ro"])
+
+    def test_unknown_mode(self):
+        with self.assertRaises(ValueError):
+            ydb_tx_mode("read_uncommitted")
+        with self.assertRaises(ValueError):
+            NFTToken.objects.ydb_tx_mode("read_uncommitted")
+
+    def test_queryset_mode(self):
+        queryset = NFTToken.objects.ydb_tx_mode("snapshot_ro")
+        list(queryset.filter(owner="0xAlice"))
+        queryset.count()
+        queryset.values("owner").annotate(tokens=Count("token_id")).count()
+        list(NFTToken.objects.all())
+
+        self.assertEqual(
+            [type(raw_cursor._tx_mode) for raw_cursor in self.raw_cursors],
+            [
+                ydb.QuerySnapshotReadOnly,
+                ydb.QuerySnapshotReadOnly,
+                ydb.QuerySnapshotReadOnly,
+                type(None),
+            ],
+        )
+        self.assertEqual(connection.ydb_tx_modes, [])
+
+
+class TestReadOnlyTransactionMiddleware(SimpleTestCase):
+    databases = {"default"}
+
+    def setUp(self):
+        self.factory = RequestFactory()
+
+        def view(request):
+            return HttpResponse(",".join(connection.ydb_tx_modes))
+
+        self.view = view
+        self.read_only_view = read_only_view(view)
+
+    def get_response(self, view, request):
+        middleware = ReadOnlyTransactionMiddleware(
+            lambda request: middleware.process_view(request, view, (), {})
+            or view(request)
+        )
+        return middleware(request)
+
+    def test_safe_method_is_read_only(self):
+        response = self.get_response(self.read_only_view, self.factory.get("/"))
+        self.assertEqual(response.content, b"snapshot_ro")
+        self.assertEqual(connection.ydb_tx_modes, [])
+
+    def test_unsafe_method_keeps_mode(self):
+        response = self.get_response(self.read_only_view, self.factory.post("/"))
+        self.assertEqual(response.content, b"")
+
+    def test_unmarked_view_keeps_mode(self):
+        response = self.get_response(self.view, self.factory.get("/"))
+        self.assertEqual(response.content, b"")
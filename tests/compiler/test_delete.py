@@ -1,4 +1,9 @@
+from django.db import connection
+from django.db.models import Exists
+from django.db.models import OuterRef
 from django.db.models import Q
+from django.db.models.sql.subqueries import DeleteQuery
+from django.test import SimpleTestCase
 from django.test import TransactionTestCase
 
 from .models import SimpleItem
@@ -111,3 +116,64 @@ class TestDelete(TransactionTestCase):
 
         SimpleItem.objects.all().delete()
         self.assertEqual(SimpleItem.objects.count(), 0)
+
+    def test_delete_by_keys(self):
+        for code in ["K100", "K200", "K300"]:
+            SimpleItem.objects.create(
+                code=code,
+                category="books",
+                quantity=1,
+                in_stock=True,
+            )
+
+        SimpleItem.objects.filter(code__in=["K100", "K300"]).delete()
+        SimpleItem.objects.get(code="K200").delete()
+
+        self.assertFalse(SimpleItem.objects.filter(code__startswith="K").exists())
+
+
+class TestDeleteCompiler(SimpleTestCase):
+    databases = {"default"}
+
+    def _compile(self, queryset):
+        query = queryset.query.chain(DeleteQuery)
+        return query.get_compiler(connection=connection).as_sql()
+
+    def test_keys_are_one_parameter(self):
+        sql, params = self._compile(
+            SimpleItem.objects.filter(code__in=["A100", "B200", "C300"])
+        )
+
+        self.assertEqual(
+            sql,
+            "DECLARE $keys as List<Struct<code:Utf8>>; "
+            "DELETE FROM `compiler_simpleitem` ON SELECT * FROM AS_TABLE($keys);",
+        )
+        self.assertEqual(
+            params["$keys"][0],
+            [{"code": "A100"}, {"code": "B200"}, {"code": "C300"}],
+        )
+
+    def test_other_filters_use_where(self):
+        sql, _ = self._compile(
+            SimpleItem.objects.filter(code__in=["A100"], quantity__gt=1)
+        )
+
+        self.assertIn("DELETE FROM `compiler_simpleitem` WHERE", sql)
+
+    def test_self_reference_uses_delete_on(self):
+        sql, _ = self._compile(
+            SimpleItem.objects.filter(
+                Exists(
+                    SimpleItem.objects.filter(
+                        category=OuterRef("category"), quantity__gt=5
+                    )
+                )
+            )
+        )
+
+        self.assertIn(
+            "DELETE FROM `compiler_simpleitem` ON "
+            "SELECT `compiler_simpleitem`.`code` FROM `compiler_simpleitem` WHERE",
+            sql,
+        )
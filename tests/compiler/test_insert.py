@@ -1,4 +1,13 @@
+import datetime
+from unittest import mock
+
+from django.db import connection
+from django.db.models.sql.subqueries import InsertQuery
 from django.test import SimpleTestCase
+from ydb_backend.models.sql.compiler import _get_data
+from ydb_backend.signals import bulk_chunk_executed
+
+from type.models import TimeModel
 
 from .models import Book
 
@@ -76,3 +85,101 @@ class TestInsert(SimpleTestCase):
         self.assertTrue(books.count() > 0)
         self.assertIn("9780679783305", isbns)
         self.assertIn("9785445303873", isbns)
+
+
+class TestBulkInsertChunks(SimpleTestCase):
+    databases = {"default"}
+
+    def _books(self, count, title_length=1):
+        return [
+            Book(
+                title="t" * title_length,
+                author="author",
+                isbn=f"chunk-{i}",
+                price=i,
+            )
+            for i in range(count)
+        ]
+
+    def _compile(self, books):
+        query = InsertQuery(Book)
+        query.insert_values(Book._meta.concrete_fields, books)
+        return query.get_compiler(connection=connection).as_sql()
+
+    def test_split_by_row_count(self):
+        with mock.patch.dict(
+            connection.settings_dict["OPTIONS"], {"bulk_batch_size": 3}
+        ):
+            statements = self._compile(self._books(10))
+
+        self.assertEqual(
+            [len(params["$in_"][0]) for _, params in statements], [3, 3, 3, 1]
+        )
+        self.assertEqual(len({sql for sql, _ in statements}), 1)
+
+    def test_split_by_size(self):
+        with mock.patch.dict(
+            connection.settings_dict["OPTIONS"], {"bulk_batch_bytes": 1000}
+        ):
+            statements = self._compile(self._books(10, title_length=400))
+
+        self.assertEqual(
+            [len(params["$in_"][0]) for _, params in statements], [2, 2, 2, 2, 2]
+        )
+
+    def test_chunks_are_reported(self):
+        chunks = []
+
+        def receiver(sender, **kwargs):
+            chunks.append(kwargs)
+
+        bulk_chunk_executed.connect(receiver)
+        try:
+            with mock.patch.dict(
+                connection.settings_dict["OPTIONS"], {"bulk_batch_size": 2}
+            ):
+                Book.objects.bulk_create(self._books(5))
+        finally:
+            bulk_chunk_executed.disconnect(receiver)
+
+        self.assertEqual([chunk["rows"] for chunk in chunks], [2, 2, 1])
+        self.assertTrue(all(chunk["model"] is Book for chunk in chunks))
+        self.assertTrue(all(chunk["size"] > 0 for chunk in chunks))
+        self.assertEqual(Book.objects.filter(isbn__startswith="chunk-").count(), 5)
+
+    def test_returning_clause(self):
+        query = InsertQuery(Book)
+        query.insert_values(Book._meta.concrete_fields, self._books(2))
+        compiler = query.get_compiler(connection=connection)
+        compiler.returning_fields = [Book._meta.pk]
+        [(sql, _)] = compiler.as_sql()
+
+        self.assertTrue(sql.endswith("FROM AS_TABLE($in_) RETURNING `isbn`;"))
+
+
+class TestGetData(SimpleTestCase):
+    def test_rows_become_structs(self):
+        fields = [Book._meta.get_field("isbn"), Book._meta.get_field("price")]
+
+        self.assertEqual(
+            _get_data(fields, [["1", 10], ["2", 20]]),
+            [{"isbn": "1", "price": 10}, {"isbn": "2", "price": 20}],
+        )
+
+    def test_datetimes_become_timestamps(self):
+        fields = [
+            TimeModel._meta.get_field("date_field"),
+            TimeModel._meta.get_field("datetime_field"),
+        ]
+        moment = datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc)
+
+        self.assertEqual(
+            _get_data(fields, [[moment.date(), moment], [moment.date(), None]]),
+            [
+                {"date_field": moment.date(), "datetime_field": 1704067200},
+                {"date_field": moment.date(), "datetime_field": None},
+            ],
+        )
+
+    def test_no_rows(self):
+        self.assertEqual(_get_data([Book._meta.get_field("isbn")], []), [])
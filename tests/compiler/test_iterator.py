@@ -0,0 +1,127 @@
+from unittest import mock
+
+from django.db import connection
+from django.test import SimpleTestCase
+from django.test import TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from ydb_backend.signals import paged_read_finished
+
+from .models import NFTToken
+
+
+class TestKeysetIterator(TransactionTestCase):
+    databases = {"default"}
+
+    def setUp(self):
+        NFTToken.objects.bulk_create(
+            [
+                NFTToken(
+                    contract_address="0x1a2b3c4d5e",
+                    token_id=f"{i:02}",
+                    owner="0xAlice" if i % 2 else "0xBob",
+                    metadata_url="ipfs://QmA",
+                    last_price=float(i),
+                )
+                for i in range(25)
+            ]
+        )
+
+    def test_iterator_reads_pages(self):
+        with CaptureQueriesContext(connection) as queries:
+            token_ids = [
+                token.token_id for token in NFTToken.objects.iterator(chunk_size=10)
+            ]
+
+        self.assertEqual(token_ids, [f"{i:02}" for i in range(25)])
+        self.assertEqual(len(queries), 3)
+
+    def test_iterator_with_filter(self):
+        prices = list(
+            NFTToken.objects.filter(owner="0xAlice")
+            .values_list("token_id", "last_price")
+            .iterator(chunk_size=4)
+        )
+
+        self.assertEqual(prices, [(f"{i:02}", float(i)) for i in range(1, 25, 2)])
+
+
+class TestKeysetEligibility(SimpleTestCase):
+    databases = {"default"}
+
+    def _pk_index(self, queryset):
+        compiler = queryset.query.get_compiler(connection=connection)
+        compiler.as_sql()
+        return compiler._get_keyset_pk_index()
+
+    def test_pk_ordering(self):
+        self.assertEqual(self._pk_index(NFTToken.objects.all()), 1)
+        self.assertEqual(self._pk_index(NFTToken.objects.order_by("pk")), 1)
+
+    def test_not_eligible(self):
+        self.assertIsNone(self._pk_index(NFTToken.objects.order_by("owner")))
+        self.assertIsNone(self._pk_index(NFTToken.objects.values_list("owner")))
+        self.assertIsNone(self._pk_index(NFTToken.objects.distinct()))
+        self.assertIsNone(self._pk_index(NFTToken.objects.all()[:5]))
+
+
+class TruncatingCursor:
+    """Return at most max_rows rows of ROWS, like a YDB data query."""
+
+    ROWS = [("0x1", f"{i:02}", "0xAlice", "ipfs://QmA", 1.0) for i in range(7)]
+    max_rows = 3
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+    def execute(self, sql, params):
+        rows = self.ROWS
+        if "$element_1" in params:
+            rows = [row for row in rows if row[1] > params["$element_1"][0]]
+        if " LIMIT " in sql:
+            rows = rows[:int(sql.rsplit(" LIMIT ", 1)[1])]
+        self.truncated = len(rows) > self.max_rows
+        self.rows = rows[:self.max_rows]
+
+    def fetchall(self):
+        return self.rows
+
+
+class TestTruncatedResult(SimpleTestCase):
+    databases = {"default"}
+
+    def setUp(self):
+        self.reads = []
+        paged_read_finished.connect(self._receiver)
+        patcher = mock.patch.object(connection, "cursor", TruncatingCursor)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        paged_read_finished.disconnect(self._receiver)
+
+    def _receiver(self, sender, **kwargs):
+        self.reads.append(kwargs)
+
+    def test_ordered_result_is_continued(self):
+        token_ids = [token.token_id for token in NFTToken.objects.order_by("pk")]
+
+        self.assertEqual(token_ids, [f"{i:02}" for i in range(7)])
+        self.assertEqual(self.reads[0]["pages"], 3)
+        self.assertEqual(self.reads[0]["rows"], 7)
+        self.assertTrue(self.reads[0]["truncated"])
+
+    def test_unordered_result_is_read_again(self):
+        token_ids = [token.token_id for token in NFTToken.objects.all()]
+
+        self.assertEqual(token_ids, [f"{i:02}" for i in range(7)])
+        self.assertEqual(self.reads[0]["pages"], 4)
+
+    def test_result_without_primary_key_stays_truncated(self):
+        with self.assertLogs("django_ydb_backend.models.sql.compiler", "WARNING"):
+            owners = list(NFTToken.objects.values_list("owner", flat=True))
+
+        self.assertEqual(len(owners), 3)
+        self.assertEqual(self.reads, [])
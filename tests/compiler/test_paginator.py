@@ -0,0 +1,136 @@
+from unittest import mock
+
+from django.db import connection
+from django.test import SimpleTestCase
+from django.test import TransactionTestCase
+from ydb_backend.paginator import EstimatedCountPaginator
+from ydb_backend.paginator import InvalidToken
+from ydb_backend.paginator import KeysetPaginator
+
+from .models import NFTToken
+
+
+class TestKeysetPaginator(TransactionTestCase):
+    databases = {"default"}
+
+    def setUp(self):
+        NFTToken.objects.bulk_create(
+            [
+                NFTToken(
+                    contract_address="0x1a2b3c4d5e",
+                    token_id=f"{i:02}",
+                    owner="0xAlice",
+                    metadata_url="ipfs://QmA",
+                    last_price=float(i // 2),
+                )
+                for i in range(7)
+            ]
+        )
+
+    def _ids(self, page):
+        return [token.token_id for token in page]
+
+    def test_pages(self):
+        paginator = KeysetPaginator(NFTToken.objects.order_by("-last_price"), 3)
+
+        first = paginator.get_page()
+        self.assertEqual(self._ids(first), ["06", "04", "05"])
+        self.assertFalse(first.has_previous())
+        self.assertTrue(first.has_next())
+
+        second = paginator.get_page(first.next_token)
+        self.assertEqual(self._ids(second), ["02", "03", "00"])
+
+        last = paginator.get_page(second.next_token)
+        self.assertEqual(self._ids(last), ["01"])
+        self.assertFalse(last.has_next())
+
+        previous = paginator.get_page(last.previous_token)
+        self.assertEqual(self._ids(previous), ["02", "03", "00"])
+        self.assertTrue(previous.has_previous())
+        self.assertTrue(previous.has_next())
+
+    def test_queryset_helper(self):
+        page = NFTToken.objects.filter(last_price__gt=0).keyset_page(per_page=4)
+
+        self.assertEqual(self._ids(page), ["02", "03", "04", "05"])
+        self.assertEqual(
+            self._ids(NFTToken.objects.keyset_page(4, token=page.next_token)),
+            ["06"],
+        )
+
+
+class TestKeysetPaginatorQuery(SimpleTestCase):
+    databases = {"default"}
+
+    def test_ordering_ends_with_primary_key(self):
+        paginator = KeysetPaginator(NFTToken.objects.order_by("-last_price"), 10)
+
+        self.assertEqual(
+            [(field.name, descending) for field, descending in paginator.ordering],
+            [("last_price", True), ("token_id", False)],
+        )
+
+    def test_seek_condition(self):
+        paginator = KeysetPaginator(NFTToken.objects.order_by("-last_price"), 10)
+        queryset = NFTToken.objects.filter(
+            paginator._seek(paginator.ordering, [2.5, "05"])
+        )
+        sql, _ = queryset.query.get_compiler(connection=connection).as_sql()
+
+        self.assertIn(
+            "WHERE (`compiler_nfttoken`.`last_price` < $element_1 OR "
+            "(`compiler_nfttoken`.`last_price` = $element_2 AND "
+            "`compiler_nfttoken`.`token_id` > $element_3))",
+            sql,
+        )
+
+    def test_token_round_trip(self):
+        paginator = KeysetPaginator(NFTToken.objects.order_by("-last_price"), 10)
+        token = paginator._encode_token(
+            NFTToken(token_id="05", last_price=2.5), backwards=True
+        )
+
+        self.assertEqual(paginator._decode_token(token), ([2.5, "05"], True))
+
+    def test_invalid_token(self):
+        paginator = KeysetPaginator(NFTToken.objects.all(), 10)
+
+        with self.assertRaises(InvalidToken):
+            paginator.get_page("not a token")
+
+    def test_related_ordering_is_rejected(self):
+        with self.assertRaises(ValueError):
+            KeysetPaginator(NFTToken.objects.order_by("owner__name"), 10)
+
+
+class TestEstimatedCount(SimpleTestCase):
+    databases = {"default"}
+
+    def setUp(self):
+        patcher = mock.patch.object(
+            connection.introspection, "get_table_row_estimate", return_value=250000
+        )
+        self.get_estimate = patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = mock.patch.object(connection, "cursor")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_large_table_is_estimated(self):
+        self.assertEqual(NFTToken.objects.estimated_count(), 250000)
+        self.assertEqual(
+            EstimatedCountPaginator(NFTToken.objects.all(), 10).num_pages, 25000
+        )
+        self.assertEqual(KeysetPaginator(NFTToken.objects.all(), 10).count, 250000)
+
+    def test_small_table_is_counted(self):
+        with mock.patch("django.db.models.QuerySet.count", return_value=7):
+            self.assertEqual(NFTToken.objects.estimated_count(threshold=10**6), 7)
+
+    def test_filtered_queryset_is_counted(self):
+        with mock.patch("django.db.models.QuerySet.count", return_value=3):
+            self.assertEqual(
+                NFTToken.objects.filter(owner="0xAlice").estimated_count(), 3
+            )
+        self.get_estimate.assert_not_called()
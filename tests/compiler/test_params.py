@@ -0,0 +1,136 @@
+import datetime
+
+import ydb
+from django.db import connection
+from django.db.models import IntegerField
+from django.db.models import OuterRef
+from django.db.models import Subquery
+from django.db.models import Value
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Concat
+from django.test import SimpleTestCase
+from ydb_backend.models.sql.compiler import _replace_placeholders
+
+from type.models import TimeModel
+
+from .models import Book
+from .models import Product
+
+
+def _compile(queryset):
+    return queryset.query.get_compiler(connection=connection).as_sql()
+
+
+class TestParamTypes(SimpleTestCase):
+    def test_lookup_params_take_field_type(self):
+        _, params = _compile(Book.objects.filter(price__gt=3, title="Emma"))
+
+        self.assertEqual(params["$element_1"], (3, ydb.PrimitiveType.Int32))
+        self.assertEqual(params["$element_2"], ("Emma", ydb.PrimitiveType.Utf8))
+
+    def test_pattern_lookup_params_are_strings(self):
+        _, params = _compile(Book.objects.filter(title__startswith="Em"))
+
+        self.assertEqual(params["$element_1"], ("Em%", ydb.PrimitiveType.Utf8))
+
+    def test_value_params_take_output_field_type(self):
+        _, params = _compile(
+            Book.objects.annotate(
+                code=Concat("isbn", Value("-x")),
+            ).filter(code="1-x")
+        )
+
+        self.assertEqual(len(params), 3)
+        self.assertEqual(params["$element_1"], ("-x", ydb.PrimitiveType.Utf8))
+        self.assertEqual(params["$element_3"], ("1-x", ydb.PrimitiveType.Utf8))
+
+    def test_year_lookup_params_take_date_column_type(self):
+        _, params = _compile(TimeModel.objects.filter(datetime_field__year=2020))
+
+        self.assertEqual(params["$element_1"][1], ydb.PrimitiveType.Datetime)
+        self.assertIsInstance(params["$element_1"][0], int)
+
+    def test_duration_params(self):
+        _, params = _compile(
+            TimeModel.objects.filter(duration_field=datetime.timedelta(days=3))
+        )
+
+        self.assertEqual(
+            params["$element_1"],
+            (datetime.timedelta(days=3), ydb.PrimitiveType.Interval),
+        )
+
+    def test_extra_where_params_take_value_type(self):
+        sql, params = _compile(Book.objects.extra(where=["price > %s"], params=[3]))
+
+        self.assertEqual(params["$element_1"], (3, ydb.PrimitiveType.Int64))
+        self.assertNotIn("Bool", sql)
+
+    def test_raw_sql_params_take_value_type(self):
+        raw = RawSQL("%s + 1", (3,), output_field=IntegerField())
+        sql, params = _compile(Book.objects.annotate(x=raw).filter(x__gt=2))
+
+        self.assertNotIn("Bool", sql)
+        self.assertEqual(
+            [param for param in params.values() if param[0] == 3],
+            [(3, ydb.PrimitiveType.Int64)] * 2,
+        )
+        self.assertIn((2, ydb.PrimitiveType.Int32), params.values())
+
+    def test_in_lookup_binds_single_list_param(self):
+        sql, params = _compile(Book.objects.filter(price__in=[1, 2, 3]))
+
+        self.assertIn("`compiler_book`.`price` IN $element_1", sql)
+        self.assertIn("DECLARE $element_1 as List<Int32>;", sql)
+        self.assertEqual(params["$element_1"][0], [1, 2, 3])
+        self.assertEqual(str(params["$element_1"][1]), "List<Int32>")
+
+    def test_in_lookup_text_does_not_depend_on_list_length(self):
+        short_sql, _ = _compile(Book.objects.filter(isbn__in=["1", "2", "3"]))
+        long_sql, params = _compile(
+            Book.objects.filter(isbn__in=[str(i) for i in range(300)])
+        )
+
+        self.assertEqual(short_sql, long_sql)
+        self.assertEqual(len(params["$element_1"][0]), 300)
+
+    def test_subquery_params_are_bound_by_outer_query(self):
+        prices = Product.objects.filter(sku=OuterRef("isbn"), stock__gt=2)
+        sql, params = _compile(
+            Book.objects.filter(price=Subquery(prices.values("price")), title="Emma")
+        )
+
+        self.assertNotIn("%s", sql)
+        self.assertEqual(params["$element_1"], (2, ydb.PrimitiveType.Int32))
+        self.assertEqual(params["$element_2"], ("Emma", ydb.PrimitiveType.Utf8))
+
+
+class TestReplacePlaceholders(SimpleTestCase):
+    def test_placeholders_are_numbered_in_order(self):
+        sql, names = _replace_placeholders("SELECT %s FROM `t` WHERE `a` = %s")
+
+        self.assertEqual(sql, "SELECT $element_1 FROM `t` WHERE `a` = $element_2")
+        self.assertEqual(names, ["$element_1", "$element_2"])
+
+    def test_literals_and_comments_are_kept(self):
+        sql, names = _replace_placeholders(
+            "SELECT 'a%sb', `c%s` -- %s\nFROM `t` /* %s */ WHERE `a` = %s"
+        )
+
+        self.assertEqual(
+            sql,
+            "SELECT 'a%sb', `c%s` -- %s\nFROM `t` /* %s */ WHERE `a` = $element_1",
+        )
+        self.assertEqual(names, ["$element_1"])
+
+    def test_escaped_percent(self):
+        sql, names = _replace_placeholders("SELECT (`a` %% %s)")
+
+        self.assertEqual(sql, "SELECT (`a` % $element_1)")
+        self.assertEqual(names, ["$element_1"])
+
+    def test_many_placeholders(self):
+        sql, names = _replace_placeholders(", ".join(["%s"] * 10000))
+
+        self.assertEqual(len(names), 10000)
+        self.assertTrue(sql.endswith("$element_9999, $element_10000"))
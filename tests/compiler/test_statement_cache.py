@@ -0,0 +1,85 @@
+from django.db import connection
+from django.test import SimpleTestCase
+from ydb_backend.models.sql.cache import StatementCache
+from ydb_backend.models.sql.cache import StatementTexts
+from ydb_backend.models.sql.cache import statement_cache
+from ydb_backend.models.sql.cache import statement_texts
+
+from .models import Product
+
+
+class TestStatementCache(SimpleTestCase):
+    def setUp(self):
+        statement_cache.clear()
+        statement_texts.clear()
+
+    def test_repeated_query_shape_hits_cache(self):
+        first_sql, first_params = Product.objects.filter(
+            category="books", price__gte=100
+        ).query.get_compiler(connection=connection).as_sql()
+        second_sql, second_params = Product.objects.filter(
+            category="toys", price__gte=5
+        ).query.get_compiler(connection=connection).as_sql()
+
+        self.assertEqual(first_sql, second_sql)
+        self.assertEqual(second_params["$element_1"][0], "toys")
+        self.assertEqual(second_params["$element_2"][0], 5)
+        info = statement_cache.info()
+        self.assertEqual(info.hits, 1)
+        self.assertEqual(info.misses, 1)
+        self.assertEqual(info.currsize, 1)
+
+    def test_different_query_shapes_miss(self):
+        Product.objects.filter(category="books").query.get_compiler(
+            connection=connection
+        ).as_sql()
+        Product.objects.filter(name="books").query.get_compiler(
+            connection=connection
+        ).as_sql()
+
+        info = statement_cache.info()
+        self.assertEqual(info.hits, 0)
+        self.assertEqual(info.misses, 2)
+
+    def test_statement_declares_bound_types(self):
+        sql, _ = Product.objects.filter(
+            category="books", price__gte=100
+        ).query.get_compiler(connection=connection).as_sql()
+
+        self.assertTrue(
+            sql.startswith(
+                "DECLARE $element_1 as Utf8; DECLARE $element_2 as Int32; SELECT "
+            )
+        )
+
+    def test_same_shape_produces_one_statement_text(self):
+        for price in range(5):
+            Product.objects.filter(price=price).query.get_compiler(
+                connection=connection
+            ).as_sql()
+        Product.objects.filter(stock=1).query.get_compiler(
+            connection=connection
+        ).as_sql()
+
+        self.assertEqual(statement_texts.count(), 2)
+
+    def test_statement_texts_are_bounded(self):
+        texts = StatementTexts(maxsize=2, samples=2)
+        for text in ["a", "b", "a", "c", "a", "b"]:
+            texts.add(text)
+
+        self.assertEqual(texts.count(), 4)
+        self.assertEqual(len(texts._hashes), 2)
+        self.assertEqual(texts.samples(), ["c", "b"])
+
+    def test_lru_eviction(self):
+        cache = StatementCache(maxsize=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        self.assertEqual(cache.get("a"), 1)
+        cache.set("c", 3)
+
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), 1)
+        self.assertEqual(cache.get("c"), 3)
+        self.assertEqual(cache.info().currsize, 2)
@@ -1,6 +1,15 @@
+from unittest import mock
+
+from django.db import connection
+from django.db.models import F
 from django.db.models import Q
+from django.test import SimpleTestCase
 from django.test import TransactionTestCase
+from ydb_backend.models.manager import UpsertQuerySet
+from ydb_backend.models.sql.subqueries import BulkUpdateQuery
+from ydb_backend.signals import batched_chunk_executed
 
+from .models import NFTToken
 from .models import Product
 from .models import SmartHomeDevice
 
@@ -97,3 +106,162 @@ class TestUpdate(TransactionTestCase):
             SmartHomeDevice.objects.get(ip_address="192.168.1.14").status,
             False
         )
+
+
+class TestBulkUpdate(TransactionTestCase):
+    databases = {"default"}
+
+    def _tokens(self, count):
+        return NFTToken.objects.bulk_create(
+            [
+                NFTToken(
+                    contract_address="0x1a2b3c4d5e",
+                    token_id=str(i),
+                    owner="0xAlice",
+                    metadata_url="ipfs://QmA",
+                    last_price=float(i),
+                )
+                for i in range(count)
+            ]
+        )
+
+    def test_bulk_update(self):
+        tokens = self._tokens(5)
+        for token in tokens:
+            token.owner = "0xBob"
+            token.last_price += 10
+
+        updated = NFTToken.objects.bulk_update(
+            tokens, ["owner", "last_price"], batch_size=2
+        )
+
+        self.assertEqual(updated, 5)
+        self.assertEqual(NFTToken.objects.filter(owner="0xBob").count(), 5)
+        self.assertEqual(NFTToken.objects.get(token_id="3").last_price, 13.0)
+        self.assertEqual(NFTToken.objects.get(token_id="3").metadata_url, "ipfs://QmA")
+
+    def test_bulk_update_counts_updated_rows(self):
+        tokens = self._tokens(3)
+        NFTToken.objects.filter(token_id="1").delete()
+        for token in tokens:
+            token.owner = "0xBob"
+
+        updated = NFTToken.objects.bulk_update(tokens, ["owner"])
+
+        self.assertEqual(updated, 2)
+        self.assertEqual(NFTToken.objects.count(), 2)
+
+    def test_bulk_update_with_expressions(self):
+        tokens = self._tokens(2)
+        for token in tokens:
+            token.last_price = F("last_price") + 1
+
+        NFTToken.objects.bulk_update(tokens, ["last_price"])
+
+        self.assertEqual(NFTToken.objects.get(token_id="1").last_price, 2.0)
+
+
+class TestBatched(TransactionTestCase):
+    databases = {"default"}
+
+    def setUp(self):
+        NFTToken.objects.bulk_create(
+            [
+                NFTToken(
+                    contract_address="0x1a2b3c4d5e",
+                    token_id=f"{i:02}",
+                    owner="0xAlice" if i % 2 else "0xBob",
+                    metadata_url="ipfs://QmA",
+                    last_price=float(i),
+                )
+                for i in range(10)
+            ]
+        )
+        self.chunks = []
+        batched_chunk_executed.connect(self._receiver)
+
+    def tearDown(self):
+        batched_chunk_executed.disconnect(self._receiver)
+
+    def _receiver(self, sender, **kwargs):
+        self.chunks.append(kwargs)
+
+    def test_batched_update(self):
+        updated = (
+            NFTToken.objects.filter(owner="0xAlice")
+            .ydb_batched(batch_size=2)
+            .update(last_price=F("last_price") + 100)
+        )
+
+        self.assertEqual(updated, 5)
+        self.assertEqual([chunk["rows"] for chunk in self.chunks], [2, 2, 1])
+        self.assertEqual([chunk["total"] for chunk in self.chunks], [2, 4, 5])
+        self.assertEqual(NFTToken.objects.get(token_id="03").last_price, 103.0)
+        self.assertEqual(NFTToken.objects.get(token_id="04").last_price, 4.0)
+
+    def test_batched_delete(self):
+        deleted, per_model = (
+            NFTToken.objects.filter(owner="0xBob").ydb_batched(batch_size=5).delete()
+        )
+
+        self.assertEqual(deleted, 5)
+        self.assertEqual(per_model, {"compiler.NFTToken": 5})
+        self.assertEqual([chunk["operation"] for chunk in self.chunks], ["delete"])
+        self.assertEqual(NFTToken.objects.count(), 5)
+
+
+class TestBatchedDeleteCount(SimpleTestCase):
+    def test_deleted_rows_are_counted_from_keys(self):
+        chunk = mock.Mock()
+        # The row count of a DELETE isn't reported.
+        chunk.delete.return_value = (-1, {"compiler.NFTToken": -1})
+
+        def execute_batched(queryset, operation, execute):
+            execute(chunk)
+            execute(chunk)
+            return 5
+
+        with mock.patch.object(
+            UpsertQuerySet, "_execute_batched", autospec=True,
+            side_effect=execute_batched,
+        ):
+            deleted = NFTToken.objects.ydb_batched(batch_size=3).delete()
+
+        self.assertEqual(deleted, (5, {"compiler.NFTToken": 5}))
+
+
+class TestBulkUpdateCompiler(SimpleTestCase):
+    databases = {"default"}
+
+    def _query(self):
+        opts = NFTToken._meta
+        tokens = [
+            NFTToken(token_id=str(i), owner="0xBob", last_price=1.0)
+            for i in range(3)
+        ]
+        query = BulkUpdateQuery(NFTToken)
+        query.insert_values([opts.pk, opts.get_field("owner")], tokens, raw=True)
+        return query
+
+    def test_update_on_statement(self):
+        [(sql, params)] = self._query().get_compiler(connection=connection).as_sql()
+
+        self.assertIn(
+            "UPDATE `compiler_nfttoken` ON (`token_id`, `owner`) "
+            "SELECT `token_id`, `owner` FROM AS_TABLE($in_);",
+            sql,
+        )
+        self.assertEqual(
+            params["$in_"][0][0], {"token_id": "0", "owner": "0xBob"}
+        )
+
+    def test_execute_counts_returned_keys(self):
+        cursor = mock.MagicMock()
+        cursor.__enter__.return_value = cursor
+        cursor.fetchall.return_value = [("0",), ("2",)]
+        compiler = self._query().get_compiler(connection=connection)
+        with mock.patch.object(connection, "cursor", return_value=cursor):
+            self.assertEqual(compiler.execute_sql(), 2)
+
+        sql, _ = cursor.execute_scheme.call_args.args
+        self.assertTrue(sql.endswith("FROM AS_TABLE($in_) RETURNING `token_id`;"))
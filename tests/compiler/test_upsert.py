@@ -1,4 +1,12 @@
+from unittest import mock
+
+from django.db import IntegrityError
+from django.db import connection
+from django.db import transaction
+from django.test import SimpleTestCase
 from django.test import TransactionTestCase
+from ydb_backend.models.manager import YDBManager
+from ydb_backend.models.sql.subqueries import UpsertQuery
 
 from .models import NFTToken
 
@@ -237,3 +245,189 @@ class NFTTokenUpsertTest(TransactionTestCase):
         self.assertEqual(results[1].token_id, "202")
         self.assertEqual(results[2].token_id, "404")
         self.assertEqual(results[3].token_id, "303")
+
+    def test_bulk_upsert_with_update_fields(self):
+        NFTToken.objects.create(**self.token1_data)
+
+        results = NFTToken.objects.bulk_upsert(
+            [
+                {**self.token1_data, "owner": "0xBob456", "last_price": 9.5},
+                self.token2_data,
+            ],
+            update_fields=["owner"],
+        )
+        self.assertEqual(NFTToken.objects.count(), 2)
+
+        updated_token1 = NFTToken.objects.get(token_id="12345")
+        self.assertEqual(updated_token1.owner, "0xBob456")
+        self.assertEqual(updated_token1.last_price, 1.5)
+
+        new_token2 = NFTToken.objects.get(token_id="12346")
+        self.assertEqual(new_token2.owner, "0xBob450")
+        self.assertEqual(new_token2.last_price, 5.7)
+
+        self.assertEqual(
+            [token.token_id for token in results], ["12345", "12346"]
+        )
+
+    def test_emulated_upsert(self):
+        NFTToken.objects.create(**self.token1_data)
+
+        results = NFTToken.objects._optimized_emulated_upsert(
+            [
+                NFTToken(**{**self.token1_data, "last_price": 3.5}),
+                NFTToken(**self.token2_data),
+                NFTToken(**{**self.token2_data, "owner": "0xCarol"}),
+            ],
+            conflict_target=["contract_address", "token_id"],
+            update_fields=["owner", "last_price"],
+        )
+        self.assertEqual(NFTToken.objects.count(), 2)
+        self.assertEqual(NFTToken.objects.get(token_id="12345").last_price, 3.5)
+        self.assertEqual(NFTToken.objects.get(token_id="12346").owner, "0xCarol")
+        self.assertEqual(
+            [token.token_id for token in results], ["12345", "12346", "12346"]
+        )
+
+    def test_emulated_upsert_partly_inserted_meanwhile(self):
+        get_existing_objects = YDBManager._get_existing_objects
+        calls = []
+
+        def get_existing_before_insert(manager, objs, conflict_target):
+            # The first read misses the row another process inserts before
+            # the bulk INSERT.
+            calls.append(objs)
+            if len(calls) == 1:
+                return {}
+            return get_existing_objects(manager, objs, conflict_target)
+
+        NFTToken.objects.create(**self.token1_data)
+        with mock.patch.object(
+            YDBManager,
+            "_get_existing_objects",
+            autospec=True,
+            side_effect=get_existing_before_insert,
+        ):
+            results = NFTToken.objects._optimized_emulated_upsert(
+                [
+                    NFTToken(**{**self.token1_data, "last_price": 3.5}),
+                    NFTToken(**self.token2_data),
+                ],
+                conflict_target=["contract_address", "token_id"],
+                update_fields=["owner", "last_price"],
+            )
+
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(NFTToken.objects.count(), 2)
+        self.assertEqual(NFTToken.objects.get(token_id="12345").last_price, 3.5)
+        self.assertEqual(NFTToken.objects.get(token_id="12346").owner, "0xBob450")
+        self.assertEqual(
+            [token.token_id for token in results], ["12345", "12346"]
+        )
+        self.assertEqual(results[0].last_price, 3.5)
+
+
+class EmulatedUpsertTest(SimpleTestCase):
+    databases = {"default"}
+
+    def setUp(self):
+        for name, value in [("connection", mock.Mock()), ("autocommit", True)]:
+            patcher = mock.patch.object(connection, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_conflict_is_retried_in_new_atomic_block(self):
+        data = {
+            "contract_address": "0x1",
+            "token_id": "1",
+            "owner": "0xAlice",
+            "metadata_url": "ipfs://Qm",
+            "last_price": 1.0,
+        }
+        stored = NFTToken(**data)
+        reads = []
+        inserts = []
+        updates = []
+
+        def get_existing_objects(manager, objs, conflict_target):
+            # A query fails in a block marked for rollback.
+            connection.validate_no_broken_transaction()
+            reads.append([obj.token_id for obj in objs])
+            # The row of token 1 is inserted by another process after the
+            # first read.
+            return {} if len(reads) == 1 else {("0x1", "1"): stored}
+
+        def bulk_create(manager, objs):
+            with transaction.atomic(savepoint=False):
+                inserts.append([obj.token_id for obj in objs])
+                if len(inserts) == 1:
+                    raise IntegrityError("duplicate key")
+            return objs
+
+        def bulk_update(manager, objs, fields):
+            updates.append(([obj.token_id for obj in objs], fields))
+
+        with mock.patch.object(
+            YDBManager, "_get_existing_objects", get_existing_objects
+        ), mock.patch.object(YDBManager, "bulk_create", bulk_create), \
+                mock.patch.object(YDBManager, "bulk_update", bulk_update):
+            results = NFTToken.objects._optimized_emulated_upsert(
+                [
+                    NFTToken(**{**data, "last_price": 3.5}),
+                    NFTToken(**{**data, "token_id": "2"}),
+                ],
+                conflict_target=["contract_address", "token_id"],
+                update_fields=["owner", "last_price"],
+            )
+
+        self.assertEqual(reads, [["1", "2"], ["1", "2"]])
+        self.assertEqual(inserts, [["1", "2"], ["2"]])
+        self.assertEqual(updates, [(["1"], ["owner", "last_price"])])
+        self.assertIs(results[0], stored)
+        self.assertEqual(stored.last_price, 3.5)
+        self.assertEqual(results[1].token_id, "2")
+
+
+class UpsertCompilerTest(SimpleTestCase):
+    databases = {"default"}
+
+    def _compiler(self):
+        tokens = [
+            NFTToken(
+                contract_address="0x1",
+                token_id=str(i),
+                owner="0xOwner",
+                metadata_url="ipfs://Qm",
+                last_price=1.0,
+            )
+            for i in range(3)
+        ]
+        query = UpsertQuery(NFTToken)
+        query.insert_values(NFTToken._meta.local_concrete_fields, tokens)
+        return query.get_compiler(connection=connection), tokens
+
+    def test_single_statement(self):
+        compiler, _ = self._compiler()
+        [(sql, params)] = compiler.as_sql()
+
+        self.assertIn("UPSERT INTO `compiler_nfttoken`", sql)
+        self.assertTrue(sql.endswith("FROM AS_TABLE($in_);"))
+        self.assertEqual(len(params["$in_"][0]), 3)
+
+    def test_update_fields_keep_stored_values(self):
+        compiler, _ = self._compiler()
+        compiler.update_fields = {NFTToken._meta.get_field("owner")}
+        [(sql, _)] = compiler.as_sql()
+
+        self.assertIn("src.`owner` AS `owner`", sql)
+        self.assertIn(
+            "COALESCE(dst.`last_price`, src.`last_price`) AS `last_price`", sql
+        )
+        self.assertIn("LEFT JOIN `compiler_nfttoken` AS dst", sql)
+
+    def test_conflict_target_must_be_primary_key(self):
+        compiler, tokens = self._compiler()
+        with self.assertRaises(NotImplementedError):
+            compiler.execute_upsert(
+                tokens, conflict_target=["owner"], update_fields=["last_price"]
+            )
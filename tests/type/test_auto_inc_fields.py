@@ -96,6 +96,31 @@ class TestAutoIncFields(TransactionTestCase):
         self.assertEqual(sorted(big_ids), big_ids)
         self.assertEqual(len(set(big_ids)), len(big_ids))
 
+    def test_save_sets_primary_key(self):
+        obj = RegularAutoIncModel(name="Returned")
+        obj.save()
+
+        self.assertIsNotNone(obj.regular_id)
+        self.assertEqual(
+            RegularAutoIncModel.objects.get(regular_id=obj.regular_id).name,
+            "Returned",
+        )
+
+    def test_bulk_create_leaves_primary_keys_unset(self):
+        objects = RegularAutoIncModel.objects.bulk_create(
+            [RegularAutoIncModel(name=f"Created {i}") for i in range(5)]
+        )
+
+        self.assertEqual([obj.regular_id for obj in objects], [None] * 5)
+        self.assertEqual(
+            list(
+                RegularAutoIncModel.objects.filter(name__startswith="Created")
+                .order_by("regular_id")
+                .values_list("name", flat=True)
+            ),
+            [f"Created {i}" for i in range(5)],
+        )
+
     def test_auto_inc_with_create(self):
         SmallAutoIncModel.objects.create(small_id=-200, name="Test Small 2")
         RegularAutoIncModel.objects.create(regular_id=2147483641, name="Test Regular 2")
@@ -1,3 +1,7 @@
+import time
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+import ydb
 from django.core.exceptions import ImproperlyConfigured
 from django.db.backends.base.base import BaseDatabaseWrapper
 from django.db.backends.base.base import logger
@@ -16,11 +20,17 @@ if Database is None:
         "Error loading ydb_dbapi module. Install it using 'pip install ydb_dbapi'."
     )
 
+from ..retry import get_statement_retry_settings
+from ..retry import statement_executed
+from ..transaction import TX_MODES
 from .client import DatabaseClient
 from .creation import DatabaseCreation
 from .features import DatabaseFeatures
 from .introspection import DatabaseIntrospection
 from .operations import DatabaseOperations
+from .pool import CONNECTION_PARAMS
+from .pool import session_pools
+from .probes import server_probes
 from .schema import DatabaseSchemaEditor
 from .validation import DatabaseValidation
 
@@ -32,6 +42,60 @@ def _db_api_version():
     return 0, 0, 0
 
 
+class CursorMixin:
+    """
+    Remember whether YDB truncated the last result, the DB-API cursor only
+    keeps the rows of its result sets, and when the connection last ran a
+    statement successfully.
+    """
+
+    truncated = False
+
+    def _fill_buffer(self, result_set_list):
+        self.truncated = any(result_set.truncated for result_set in result_set_list)
+        self._connection.last_success = time.monotonic()
+        super()._fill_buffer(result_set_list)
+
+
+class Cursor(CursorMixin, Database.Cursor):
+    """
+    Within ydb_backend.retry.call_with_retry(), the statements aren't retried
+    by the driver and the writes are recorded.
+    """
+
+    def execute(self, query, parameters=None):
+        self._retry_settings = get_statement_retry_settings(
+            self._connection.retry_settings
+        )
+        super().execute(query, parameters)
+        statement_executed(query)
+
+    def execute_scheme(self, query, parameters=None):
+        self._retry_settings = get_statement_retry_settings(
+            self._connection.retry_settings
+        )
+        super().execute_scheme(query, parameters)
+        statement_executed(query)
+
+
+class AsyncCursor(CursorMixin, Database.AsyncCursor):
+    pass
+
+
+def _with_session_pool(conn_params, pool):
+    """
+    Return the parameters of a connection on a shared session pool, without
+    those of the driver.
+    """
+    conn_params = {
+        name: value
+        for name, value in conn_params.items()
+        if name in CONNECTION_PARAMS
+    }
+    conn_params["ydb_session_pool"] = pool
+    return conn_params
+
+
 class DatabaseWrapper(BaseDatabaseWrapper):
     """
     Represent a database connection.
@@ -119,6 +183,49 @@ class DatabaseWrapper(BaseDatabaseWrapper):
         "iendswith": "ILIKE '%%%s' ESCAPE '\\'",
     }
 
+    # OPTIONS handled by the backend itself with their default values. The
+    # remaining OPTIONS are passed to ydb_dbapi.connect().
+    backend_options = {
+        # Maximum number of rows sent in one bulk INSERT/UPSERT statement.
+        "bulk_batch_size": 10000,
+        # Maximum estimated payload size of one bulk INSERT/UPSERT statement.
+        "bulk_batch_bytes": 8 * 1024 * 1024,
+        # Tables with fewer rows by their statistics are counted exactly by
+        # estimated_count().
+        "estimated_count_threshold": 100000,
+        # Transaction mode of the queries of safe requests to read-only views
+        # with ydb_backend.middleware.ReadOnlyTransactionMiddleware.
+        "read_only_tx_mode": "snapshot_ro",
+        # Retry SELECTs outside of transactions after retryable YDB errors,
+        # see ydb_backend.retry.
+        "retry_reads": False,
+        # Share one driver and session pool between the connections of the
+        # process with the same parameters, see pool.SessionPoolRegistry.
+        "shared_session_pool": True,
+        # Maximum number of sessions of a shared session pool.
+        "session_pool_size": 100,
+        # Seconds after a successful statement during which is_usable()
+        # trusts the driver state instead of running SELECT 1.
+        "health_check_window": 30,
+        # Seconds for which the server version and capabilities are cached by
+        # the process.
+        "server_probe_ttl": 3600,
+        # Run the SELECT of async for, aget(), afirst() and alast() of
+        # YDBManager on an asyncio connection instead of a thread, see
+        # ydb_backend.models.sql.aio. Opt-in, as only querysets evaluated
+        # with a single SELECT can run this way.
+        "native_async": False,
+        # Seconds for which the process caches table descriptions for the
+        # introspection, see describe.DescribeCache. Opt-in, as DDL run by
+        # other processes isn't seen until the descriptions expire.
+        "describe_cache_ttl": 0,
+        # Threads describing the tables missing from the cache.
+        "describe_workers": 16,
+        # Path of a JSON snapshot of the cached descriptions, shared by the
+        # processes started within describe_cache_ttl.
+        "describe_snapshot": None,
+    }
+
     Database = Database
     SchemaEditorClass = DatabaseSchemaEditor
     client_class = DatabaseClient
@@ -128,57 +235,112 @@ class DatabaseWrapper(BaseDatabaseWrapper):
     ops_class = DatabaseOperations
     validation_class = DatabaseValidation
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Modes entered with ydb_backend.transaction.ydb_tx_mode(), the
+        # innermost last.
+        self.ydb_tx_modes = []
+        # The ydb_dbapi asyncio connection of native async queries.
+        self.async_connection = None
+
     # def get_driver(self):
     #     return self.connection._driver
 
+    def get_backend_option(self, name):
+        """
+        Return the value of a backend option from OPTIONS or its default.
+        """
+        return self.settings_dict["OPTIONS"].get(name, self.backend_options[name])
+
     def get_table_names(self):
         return self.connection.get_table_names()
 
     def get_describe(self, table_name):
         return self.connection.describe(table_name)
 
+    def get_server_probe(self, name, probe):
+        """
+        Return the result of probe(), cached by the process for the endpoint
+        of this database for the server_probe_ttl backend option.
+        """
+        endpoint = (
+            self.settings_dict["HOST"],
+            self.settings_dict["PORT"],
+            self.settings_dict["DATABASE"],
+        )
+        return server_probes.get(
+            endpoint, name, probe, ttl=self.get_backend_option("server_probe_ttl")
+        )
+
+    def _get_server_version(self):
+        """
+        Return the version of the server, None if it can't be queried.
+        """
+        try:
+            return self.get_server_probe("version", self._query_server_version)
+        except (
+            OperationalError,
+            ProgrammingError,
+            Database.OperationalError,
+            Database.ProgrammingError,
+        ) as e:
+            logger.warning(f"Failed to get database version: {e}.")
+            return None
+        except (DatabaseError, Database.DatabaseError) as e:
+            logger.error(f"Database error while getting version: {e}")
+            raise
+
+    def _query_server_version(self):
+        self.ensure_connection()
+        with self.connection.cursor() as cursor:
+            cursor.execute("SELECT version()")
+            row = cursor.fetchone()
+        if not row:
+            return None
+        version = row[0]
+        if isinstance(version, bytes):
+            version = version.decode("utf-8")
+        parts = version.split("-")[0].split(".")
+        try:
+            return tuple(int(part) for part in parts)
+        except ValueError:
+            return tuple(parts)
+
     def get_database_version(self):
         """
         Return a tuple of the database's version.
         E.g. for ydb_version "23.4.11", return (23, 4, 11) or for ydb_version
-        from trunk return "main".
+        from trunk return ("main",). Fall back to the driver version if the
+        server can't be queried.
         """
-        try:
-            with self.connection.cursor() as cursor:
-                cursor.execute("SELECT version()")
-                row = cursor.fetchone()
-                if row:
-                    parts = row[0].decode("utf-8").split("-")[0].split(".")
-                    return tuple(part for part in parts)
-                return None
-        except (OperationalError, ProgrammingError) as e:
-            logger.warning(
-                f"Failed to get database version: {e}. "
-                f"Falling back to driver version."
-            )
+        version = self._get_server_version()
+        if version is None:
+            logger.warning("Falling back to driver version.")
             return _db_api_version()
-        except DatabaseError as e:
-            logger.error(f"Database error while getting version: {e}")
-            raise
+        return version
 
     def check_database_version_supported(self):
         """
         Raise an error if the database version isn't supported by this
         version of Django.
         """
+        min_version = self.features.minimum_database_version
+        version = self._get_server_version()
         if (
-                self.features.minimum_database_version is not None
-                and self.get_database_version() != ("main",)
-                and self.get_database_version() < self.features.minimum_database_version
+            min_version is None
+            or not version
+            or not all(isinstance(part, int) for part in version)
+            or version >= min_version
         ):
-            db_version = ".".join(map(str, self.get_database_version()))
-            min_db_version = ".".join(map(str, self.features.minimum_database_version))
-            error_msg = (
-                f"{self.display_name} {min_db_version} or later is required "
-                f"(found {db_version})."
-            )
+            return
 
-            raise NotSupportedError(error_msg)
+        db_version = ".".join(map(str, version))
+        min_db_version = ".".join(map(str, min_version))
+        error_msg = (
+            f"{self.display_name} {min_db_version} or later is required "
+            f"(found {db_version})."
+        )
+        raise NotSupportedError(error_msg)
 
     def get_connection_params(self):
         """
@@ -203,7 +365,11 @@ class DatabaseWrapper(BaseDatabaseWrapper):
             "host": settings_dict["HOST"],
             "port": settings_dict["PORT"],
             "database": settings_dict["DATABASE"],
-            **settings_dict.get("OPTIONS", {}),
+            **{
+                name: value
+                for name, value in settings_dict.get("OPTIONS", {}).items()
+                if name not in self.backend_options
+            },
         }
         if settings_dict.get("NAME"):
             conn_params["name"] = settings_dict["NAME"]
@@ -226,9 +392,19 @@ class DatabaseWrapper(BaseDatabaseWrapper):
         """
         try:
             logger.debug(f"Connecting to YDB with params: {conn_params}")
+            if (
+                self.get_backend_option("shared_session_pool")
+                and "ydb_session_pool" not in conn_params
+            ):
+                pool = session_pools.get(
+                    conn_params, size=self.get_backend_option("session_pool_size")
+                )
+                conn_params = _with_session_pool(conn_params, pool)
             connection = Database.connect(**conn_params)
+            connection._cursor_cls = Cursor
+            connection.last_success = time.monotonic()
             logger.info("Successfully connected to YDB.")
-        except DatabaseError as e:
+        except (DatabaseError, Database.Error, ydb.Error) as e:
             logger.error(f"Failed to connect to YDB: {e}")
             msg = f"Failed to connect to YDB: {e}"
             raise OperationalError(msg) from e
@@ -239,7 +415,47 @@ class DatabaseWrapper(BaseDatabaseWrapper):
         """
         Create a cursor. Assume that a connection is established.
         """
-        return self.connection.cursor()
+        return self._set_tx_mode(self.connection.cursor())
+
+    def _set_tx_mode(self, cursor):
+        if self.ydb_tx_modes:
+            cursor._tx_mode = TX_MODES[self.ydb_tx_modes[-1]]
+        return cursor
+
+    async def aensure_connection(self):
+        """
+        Open the asyncio connection of native async queries on the shared
+        session pool of the running event loop, if not already open.
+        """
+        if self.async_connection is not None:
+            return
+        conn_params = self.get_connection_params()
+        try:
+            pool = await session_pools.aget(
+                conn_params, size=self.get_backend_option("session_pool_size")
+            )
+            connection = await Database.async_connect(
+                **_with_session_pool(conn_params, pool)
+            )
+        except (DatabaseError, Database.Error, ydb.Error) as e:
+            logger.error(f"Failed to connect to YDB: {e}")
+            msg = f"Failed to connect to YDB: {e}"
+            raise OperationalError(msg) from e
+        connection._cursor_cls = AsyncCursor
+        self.async_connection = connection
+
+    async def acursor(self):
+        """
+        Create a cursor of the asyncio connection, opening it if needed.
+        """
+        await self.aensure_connection()
+        return self._set_tx_mode(self.async_connection.cursor())
+
+    def close(self):
+        # The asyncio connection only wraps the shared session pool and has
+        # no session of its own between statements.
+        self.async_connection = None
+        super().close()
 
     def _set_autocommit(self, autocommit):
         """
@@ -250,17 +466,32 @@ class DatabaseWrapper(BaseDatabaseWrapper):
         """
         Test if the database connection is usable.
 
-        This method may assume that self.connection is not None.
-
-        Actual implementations should take care not to raise exceptions
-        as that may prevent Django from recycling unusable connections.
+        The connection is usable while the driver has an endpoint to send
+        requests to and a statement has succeeded within the
+        health_check_window backend option. SELECT 1 is only run when that
+        isn't known, e.g. after an error or a longer idle time.
         """
         if self.connection is None:
             return False
+        try:
+            self.connection._driver.wait(0, fail_fast=True)
+        except (FutureTimeoutError, ydb.Error) as e:
+            logger.warning(f"Connection is not usable: no YDB endpoint ({e!r}).")
+            return False
+
+        last_success = getattr(self.connection, "last_success", None)
+        if (
+            not self.errors_occurred
+            and last_success is not None
+            and time.monotonic() - last_success
+            < self.get_backend_option("health_check_window")
+        ):
+            return True
+
         try:
             with self.create_cursor() as cursor:
                 cursor.execute("SELECT 1")
                 return cursor.rowcount == 1
-        except DatabaseError as e:
+        except (DatabaseError, Database.Error) as e:
             logger.warning(f"Connection is not usable: {e}")
             return False
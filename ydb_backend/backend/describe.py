@@ -0,0 +1,194 @@
+import json
+import logging
+import os
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+logger = logging.getLogger("django_ydb_backend.backend.describe")
+
+DEFAULT_DESCRIBE_TTL = 300
+DEFAULT_DESCRIBE_WORKERS = 16
+
+# The parts of ydb.TableSchemeEntry used by the introspection, in a form that
+# can be saved to a snapshot.
+TableDescription = namedtuple(
+    "TableDescription", ["name", "columns", "primary_key", "indexes"]
+)
+ColumnDescription = namedtuple("ColumnDescription", ["name", "type"])
+IndexDescription = namedtuple("IndexDescription", ["name", "index_columns"])
+
+
+def to_table_description(table_scheme_entry):
+    """
+    Return the TableDescription of a ydb.TableSchemeEntry.
+    """
+    return TableDescription(
+        name=table_scheme_entry.name,
+        columns=[
+            ColumnDescription(column.name, str(column.type))
+            for column in table_scheme_entry.columns
+        ],
+        primary_key=list(table_scheme_entry.primary_key),
+        indexes=[
+            IndexDescription(index.name, list(index.index_columns))
+            for index in table_scheme_entry.indexes
+        ],
+    )
+
+
+def _load_table_description(data):
+    return TableDescription(
+        name=data["name"],
+        columns=[ColumnDescription(*column) for column in data["columns"]],
+        primary_key=data["primary_key"],
+        indexes=[IndexDescription(*index) for index in data["indexes"]],
+    )
+
+
+class DescribeCache:
+    """
+    Table descriptions kept by the process for each database, shared by all
+    the introspection methods so a table is described once instead of once
+    per method.
+
+    Missing descriptions of several tables are fetched in parallel. A
+    description expires after ttl seconds, and the schema editor invalidates
+    the tables it alters. The descriptions of a database can also be saved to
+    a JSON snapshot and loaded by the next process, e.g. the next manage.py
+    command.
+    """
+
+    def __init__(self):
+        self._entries = {}
+        # Incremented by invalidate() for each database, so a description
+        # fetched meanwhile isn't cached.
+        self._generations = {}
+        self._snapshots = set()
+        self._lock = threading.Lock()
+
+    def get(self, database, table_name, describe, ttl=DEFAULT_DESCRIBE_TTL):
+        """
+        Return the description of table_name, at most ttl seconds old, with
+        describe(table_name) if it isn't cached.
+        """
+        return self.get_many(database, [table_name], describe, ttl)[table_name]
+
+    def get_many(
+        self,
+        database,
+        table_names,
+        describe,
+        ttl=DEFAULT_DESCRIBE_TTL,
+        workers=DEFAULT_DESCRIBE_WORKERS,
+    ):
+        """
+        Return a dict of the descriptions of table_names, describing the
+        missing ones with up to workers threads.
+        """
+        now = time.time()
+        descriptions = {}
+        missing = []
+        with self._lock:
+            generation = self._generations.get(database, 0)
+            for table_name in table_names:
+                entry = self._entries.get((database, table_name))
+                if entry is not None and now - entry[1] < ttl:
+                    descriptions[table_name] = entry[0]
+                else:
+                    missing.append(table_name)
+        if not missing:
+            return descriptions
+
+        if len(missing) == 1 or workers <= 1:
+            described = [describe(table_name) for table_name in missing]
+        else:
+            with ThreadPoolExecutor(
+                max_workers=min(workers, len(missing)),
+                thread_name_prefix="ydb-describe",
+            ) as executor:
+                described = list(executor.map(describe, missing))
+
+        with self._lock:
+            cache = ttl > 0 and self._generations.get(database, 0) == generation
+            for table_name, description in zip(missing, described):
+                if cache:
+                    self._entries[(database, table_name)] = (description, now)
+                descriptions[table_name] = description
+        return descriptions
+
+    def invalidate(self, database, table_names=None):
+        """
+        Forget the descriptions of table_names, or of all the tables of the
+        database.
+        """
+        with self._lock:
+            self._generations[database] = self._generations.get(database, 0) + 1
+            for key in list(self._entries):
+                if key[0] == database and (
+                    table_names is None or key[1] in table_names
+                ):
+                    del self._entries[key]
+
+    def load(self, database, path, ttl=DEFAULT_DESCRIBE_TTL):
+        """
+        Add the descriptions of a snapshot saved by save() that are at most ttl
+        seconds old, once per process. A missing or unreadable snapshot is
+        ignored.
+        """
+        with self._lock:
+            if (database, path) in self._snapshots:
+                return
+            self._snapshots.add((database, path))
+        try:
+            with Path(path).open() as file:
+                snapshot = json.load(file)
+            tables = {
+                table_name: (_load_table_description(data), fetched)
+                for table_name, (data, fetched) in snapshot["tables"].items()
+            }
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.warning("Ignoring the describe snapshot %s: %r", path, e)
+            return
+        if snapshot.get("database") != list(database):
+            return
+
+        now = time.time()
+        with self._lock:
+            for table_name, (description, fetched) in tables.items():
+                key = (database, table_name)
+                if now - fetched < ttl and key not in self._entries:
+                    self._entries[key] = (description, fetched)
+
+    def save(self, database, path):
+        """
+        Save the cached descriptions of the database to a snapshot at path.
+        """
+        with self._lock:
+            tables = {
+                key[1]: (description._asdict(), fetched)
+                for key, (description, fetched) in self._entries.items()
+                if key[0] == database
+            }
+        # Write a new file and rename it, so another process never reads a
+        # partial snapshot.
+        tmp_path = Path(f"{path}.{os.getpid()}.tmp")
+        try:
+            with tmp_path.open("w") as file:
+                json.dump({"database": list(database), "tables": tables}, file)
+            tmp_path.replace(path)
+        except OSError as e:
+            logger.warning("Failed to save the describe snapshot %s: %r", path, e)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._generations.clear()
+            self._snapshots.clear()
+
+
+describe_cache = DescribeCache()
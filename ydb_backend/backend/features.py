@@ -28,9 +28,14 @@ class DatabaseFeatures(BaseDatabaseFeatures):
     # constraint exists and some fields are nullable but not all of them?
     supports_partially_nullable_unique_constraints = False
 
-    can_return_rows_from_bulk_insert = False
+    # The first server version with INSERT/UPSERT ... RETURNING.
+    minimum_returning_version = (25, 1)
+
     uses_savepoints = False
 
+    # Can YDBManager.bulk_upsert() use a native UPSERT statement?
+    can_return_upserted_objects = True
+
     # Can a fixture contain forward references? i.e., are
     # FK constraints checked at the end of transaction, or
     # at the end of each save operation?
@@ -199,3 +204,23 @@ class DatabaseFeatures(BaseDatabaseFeatures):
     django_test_skips = {}
 
     supports_transactions = True
+
+    def _server_version_at_least(self, version):
+        server_version = self.connection.get_database_version()
+        if not server_version:
+            return False
+        if server_version[0] == "main":
+            return True
+        if not all(isinstance(part, int) for part in server_version):
+            return False
+        return server_version >= version
+
+    # Can an INSERT return the columns of the inserted rows?
+    @cached_property
+    def can_return_columns_from_insert(self):
+        return self._server_version_at_least(self.minimum_returning_version)
+
+    # RETURNING doesn't tell which input row a returned row comes from, and
+    # generated serial values have no key sent by the client to match them
+    # with, so bulk_create() leaves generated primary keys unset.
+    can_return_rows_from_bulk_insert = False
@@ -1,8 +1,16 @@
+import posixpath
 from collections import namedtuple
 
+import ydb
+from django.db import connections
 from django.db.backends.base.introspection import BaseDatabaseIntrospection
 from django.db.backends.base.introspection import FieldInfo as BaseFieldInfo
 from django.db.backends.base.introspection import TableInfo as BaseTableInfo
+from django.db.models.signals import post_migrate
+from django.db.models.signals import pre_migrate
+
+from .describe import describe_cache
+from .describe import to_table_description
 
 FieldInfo = namedtuple("FieldInfo", BaseFieldInfo._fields)
 TableInfo = namedtuple("TableInfo", BaseTableInfo._fields)
@@ -136,25 +144,96 @@ class DatabaseIntrospection(BaseDatabaseIntrospection):
             if include_views or ti.type == "t"
         )
 
+    def __init__(self, connection):
+        super().__init__(connection)
+        # Whether describe_tables() may load the describe snapshot, see
+        # skip_describe_snapshot().
+        self.use_describe_snapshot = True
+
+    def skip_describe_snapshot(self):
+        """
+        Stop loading the describe snapshot of a previous process and forget
+        the descriptions it added, before the schema is changed or read for
+        others. Called by the schema editor and the migrate signals, e.g. of
+        migrate and flush. The descriptions fetched afterwards are still
+        saved to the snapshot.
+        """
+        if not self.use_describe_snapshot:
+            return
+        self.use_describe_snapshot = False
+        if self.connection.get_backend_option("describe_snapshot"):
+            self.invalidate_descriptions()
+
+    def describe_tables(self, table_names):
+        """
+        Return a dict of the TableDescriptions of table_names, cached by the
+        process for the introspection methods and described in parallel when
+        missing, see ydb_backend.backend.describe.
+        """
+        connection = self.connection
+        connection.ensure_connection()
+        database = self._get_describe_key()
+        ttl = connection.get_backend_option("describe_cache_ttl")
+        snapshot = connection.get_backend_option("describe_snapshot")
+        if snapshot and self.use_describe_snapshot:
+            describe_cache.load(database, snapshot, ttl)
+
+        described = []
+
+        def describe(table_name):
+            described.append(table_name)
+            return to_table_description(connection.get_describe(table_name))
+
+        descriptions = describe_cache.get_many(
+            database,
+            table_names,
+            describe,
+            ttl=ttl,
+            workers=connection.get_backend_option("describe_workers"),
+        )
+        if snapshot and described:
+            describe_cache.save(database, snapshot)
+        return descriptions
+
+    def _describe(self, table_name):
+        return self.describe_tables([table_name])[table_name]
+
+    def invalidate_descriptions(self, table_names=None):
+        """
+        Forget the cached descriptions of table_names, or of all the tables of
+        the database, after they were altered.
+        """
+        database = self._get_describe_key()
+        describe_cache.invalidate(database, table_names)
+        snapshot = self.connection.get_backend_option("describe_snapshot")
+        if snapshot:
+            describe_cache.save(database, snapshot)
+
+    def _get_describe_key(self):
+        settings_dict = self.connection.settings_dict
+        return (
+            settings_dict["HOST"],
+            settings_dict["PORT"],
+            settings_dict["DATABASE"],
+            settings_dict["OPTIONS"].get("ydb_table_path_prefix", ""),
+        )
+
     def get_table_list(self, cursor):
         """
         Return an unsorted list of TableInfo named tuples of all tables and
         views that exist in the database.
         """
-        result = []
-        table_names = self.connection.get_table_names()
-
-        for table_name in table_names:
-            table_scheme_entry = self.connection.get_describe(table_name)
-            result.append(_create_table_info(table_scheme_entry))
-        return result
+        descriptions = self.describe_tables(self.connection.get_table_names())
+        return [
+            _create_table_info(description) for description in descriptions.values()
+        ]
 
     def get_table_description(self, cursor, table_name):
         """
         Return a description of the table with the DB-API cursor.description
         interface.
         """
-        table_scheme_entry = self.connection.get_describe(table_name)
+        table_scheme_entry = self._describe(table_name)
         return _create_table_desc_info(table_scheme_entry.columns)
 
     def get_sequences(self, cursor, table_name, table_fields=()):
@@ -163,9 +242,30 @@ class DatabaseIntrospection(BaseDatabaseIntrospection):
         is a dict: {'table': <table_name>, 'column': <column_name>}. An optional
         'name' key can be added if the backends supports named sequences.
         """
-        table_scheme_entry = self.connection.get_describe(table_name)
+        table_scheme_entry = self._describe(table_name)
         return _create_sequences_info(table_name, table_scheme_entry.columns)
 
+    def get_table_row_estimate(self, cursor, table_name):
+        """
+        Return the number of rows of table_name from the statistics YDB keeps
+        per partition, or None if there are none. The statistics are updated
+        in the background and can lag behind recent changes.
+        """
+        database = self.connection.settings_dict["DATABASE"]
+        path = posixpath.join(
+            database,
+            self.connection.connection.table_path_prefix,
+            table_name,
+        )
+        cursor.execute(
+            f"DECLARE $path as Utf8; "
+            f"SELECT SUM(RowCount) FROM `{database}/.sys/partition_stats` "
+            f"WHERE Path = $path",
+            {"$path": (path, ydb.PrimitiveType.Utf8)},
+        )
+        row = cursor.fetchone()
+        return row[0] if row else None
+
     def get_relations(self, cursor, table_name):
         """
         YDB does not support foreign key constraints.
@@ -178,7 +278,7 @@ class DatabaseIntrospection(BaseDatabaseIntrospection):
         """
         Return a list of primary key columns for the given table.
         """
-        table_scheme_entry = self.connection.get_describe(table_name)
+        table_scheme_entry = self._describe(table_name)
         return table_scheme_entry.primary_key
 
     def get_constraints(self, cursor, table_name):
@@ -201,7 +301,7 @@ class DatabaseIntrospection(BaseDatabaseIntrospection):
         if they don't name constraints of a certain type (e.g. SQLite)
         """
         constraints = {}
-        table_scheme_entry = self.connection.get_describe(table_name)
+        table_scheme_entry = self._describe(table_name)
 
         if table_scheme_entry.primary_key:
             constraints["primary_key"] = _get_constraint_tuple(
@@ -220,3 +320,17 @@ class DatabaseIntrospection(BaseDatabaseIntrospection):
             )
 
         return constraints
+
+
+def _skip_describe_snapshot(sender, using, **kwargs):  # noqa: ARG001
+    connection = connections[using]
+    if connection.vendor == "ydb":
+        connection.introspection.skip_describe_snapshot()
+
+
+pre_migrate.connect(
+    _skip_describe_snapshot, dispatch_uid="ydb_backend.pre_migrate_describe"
+)
+post_migrate.connect(
+    _skip_describe_snapshot, dispatch_uid="ydb_backend.post_migrate_describe"
+)
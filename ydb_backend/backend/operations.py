@@ -332,7 +332,9 @@ class DatabaseOperations(BaseDatabaseOperations):
         Return the maximum number of items that can be passed in a single 'IN'
         list condition, or None if the backends does not impose a limit.
         """
-        # YQL has a limit on the size of a query in bytes (about 1Mb)
+        # YQL has a limit on the size of a query in bytes (about 1Mb), but the
+        # values of an IN list are bound as a single List<T> parameter and
+        # don't count towards it.
 
     def max_name_length(self):
         """
@@ -413,6 +415,5 @@ class DatabaseOperations(BaseDatabaseOperations):
         Savepoint operations are not supported in YDB - empty stub for Django
         """
 
-    @staticmethod
-    def upsert_statement():
+    def upsert_statement(self, on_conflict=None):
         return "UPSERT INTO"
@@ -0,0 +1,189 @@
+import asyncio
+import os
+import threading
+
+import ydb
+from ydb_dbapi.utils import prepare_credentials
+from ydb_dbapi.utils import prepare_driver_config_kwargs
+
+# Parameters of ydb_dbapi.connect() that are kept by each connection, the
+# others configure the driver.
+CONNECTION_PARAMS = (
+    "host",
+    "port",
+    "database",
+    "ydb_table_path_prefix",
+    "protocol",
+    "credentials",
+    "pyformat",
+)
+
+DEFAULT_POOL_SIZE = 100
+
+
+class SessionPoolRegistry:
+    """
+    Process-wide YDB drivers and session pools, one for each set of connection
+    parameters, shared by the Django connections of all threads.
+
+    Each driver runs endpoint discovery and keeps its gRPC channels for the
+    life of the process, so a new Django connection only has to wrap the
+    pool. The registry is emptied in a forked child, as gRPC channels can't
+    be used across a fork.
+
+    The asyncio drivers of native async queries are bound to the event loop
+    they were created in, so aget() keeps them for each loop.
+    """
+
+    def __init__(self):
+        self._pools = {}
+        self._async_pools = {}
+        # A lock for each key whose pool is being created, so that one
+        # driver is created for a key without blocking the other keys.
+        self._creating = {}
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+
+    def get(self, conn_params, size=DEFAULT_POOL_SIZE, timeout=10):
+        """
+        Return the session pool for conn_params, creating its driver and
+        waiting up to timeout seconds for it to be ready on first use.
+        """
+        key = (_get_key(conn_params), size)
+        with self._lock:
+            self._check_pid()
+            entry = self._pools.get(key)
+            if entry is not None:
+                return entry[0]
+            key_lock = self._creating.setdefault(key, threading.Lock())
+
+        with key_lock:
+            with self._lock:
+                entry = self._pools.get(key)
+            if entry is None:
+                created = self._create_pool(conn_params, size, timeout)
+                with self._lock:
+                    entry = self._pools.setdefault(key, created)
+                    self._creating.pop(key, None)
+                # Another pool was added meanwhile, e.g. after close().
+                if entry is not created:
+                    _stop_pool(*created)
+        return entry[0]
+
+    async def aget(self, conn_params, size=DEFAULT_POOL_SIZE, timeout=10):
+        """
+        Return the asyncio session pool for conn_params in the running event
+        loop, the counterpart of get() for ydb_dbapi.async_connect().
+        """
+        loop = asyncio.get_running_loop()
+        key = (_get_key(conn_params), size, loop)
+        with self._lock:
+            self._check_pid()
+            task = self._async_pools.get(key)
+            if task is None:
+                # Concurrent callers wait for the same driver.
+                task = loop.create_task(
+                    self._acreate_pool(conn_params, size, timeout)
+                )
+                self._async_pools[key] = task
+        try:
+            pool, _ = await asyncio.shield(task)
+        except Exception:
+            with self._lock:
+                if self._async_pools.get(key) is task:
+                    del self._async_pools[key]
+            raise
+        return pool
+
+    def _check_pid(self):
+        if self._pid != os.getpid():
+            self._pools = {}
+            self._async_pools = {}
+            self._creating = {}
+            self._pid = os.getpid()
+
+    def _create_pool(self, conn_params, size, timeout):
+        driver = ydb.Driver(_get_driver_config(conn_params))
+        try:
+            driver.wait(timeout, fail_fast=True)
+        except Exception:
+            driver.stop()
+            raise
+        return ydb.QuerySessionPool(driver, size=size), driver
+
+    async def _acreate_pool(self, conn_params, size, timeout):
+        driver = ydb.aio.Driver(_get_driver_config(conn_params))
+        try:
+            await driver.wait(timeout, fail_fast=True)
+        except Exception:
+            await driver.stop()
+            raise
+        return ydb.aio.QuerySessionPool(driver, size=size), driver
+
+    def close(self):
+        """
+        Stop all the session pools and their drivers.
+        """
+        with self._lock:
+            pools, self._pools = self._pools, {}
+        for pool, driver in pools.values():
+            _stop_pool(pool, driver)
+
+    async def aclose(self):
+        """
+        Stop the asyncio session pools of the running event loop and their
+        drivers.
+        """
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            tasks = [
+                self._async_pools.pop(key)
+                for key in list(self._async_pools)
+                if key[2] is loop
+            ]
+        for result in await asyncio.gather(*tasks, return_exceptions=True):
+            if isinstance(result, Exception):
+                continue
+            pool, driver = result
+            await pool.stop()
+            await driver.stop()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._pools) + len(self._async_pools)
+
+
+def _stop_pool(pool, driver):
+    pool.stop()
+    driver.stop()
+
+
+def _get_driver_config(conn_params):
+    params = {
+        name: value
+        for name, value in conn_params.items()
+        if name not in CONNECTION_PARAMS
+    }
+    root_certificates = params.pop("root_certificates", None)
+    root_certificates_path = params.pop("root_certificates_path", None)
+    if root_certificates is None:
+        root_certificates = ydb.load_ydb_root_certificate(root_certificates_path)
+    driver_config_kwargs = prepare_driver_config_kwargs(
+        params.pop("driver_config_kwargs", None), params
+    )
+
+    protocol = conn_params.get("protocol") or "grpc"
+    return ydb.DriverConfig(
+        endpoint=f"{protocol}://{conn_params['host']}:{conn_params['port']}",
+        database=conn_params["database"],
+        credentials=prepare_credentials(conn_params.get("credentials")),
+        root_certificates=root_certificates,
+        **driver_config_kwargs,
+    )
+
+
+def _get_key(conn_params):
+    return tuple(sorted((name, repr(value)) for name, value in conn_params.items()))
+
+
+session_pools = SessionPoolRegistry()
@@ -0,0 +1,41 @@
+import threading
+import time
+
+DEFAULT_PROBE_TTL = 3600
+
+
+class ServerProbes:
+    """
+    Results of server probes (the version, supported statements and
+    functions), kept by the process for each endpoint so connections don't
+    have to query them again.
+
+    A probe that raises isn't cached.
+    """
+
+    def __init__(self):
+        self._results = {}
+        self._lock = threading.Lock()
+
+    def get(self, endpoint, name, probe, ttl=DEFAULT_PROBE_TTL):
+        """
+        Return the result of probe() for endpoint, at most ttl seconds old.
+        """
+        key = (endpoint, name)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._results.get(key)
+            if entry is not None and entry[1] > now:
+                return entry[0]
+
+        value = probe()
+        with self._lock:
+            self._results[key] = (value, now + ttl)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._results.clear()
+
+
+server_probes = ServerProbes()
@@ -1,4 +1,5 @@
 import logging
+import re
 from datetime import date
 from datetime import datetime
 from datetime import time
@@ -13,6 +14,18 @@ from django.db.transaction import TransactionManagementError
 logger = logging.getLogger("django_ydb_backend.ydb_backend.backend.schema")
 
 
+# Tables named by the DDL statements of the editor.
+_altered_table_re = re.compile(r"\b(?:TABLE|RENAME TO)\s+`([^`]+)`", re.IGNORECASE)
+
+
+def _get_altered_tables(sql):
+    """
+    Return the names of the tables altered by sql, or None if they aren't
+    known, e.g. for RunSQL statements.
+    """
+    return set(_altered_table_re.findall(sql)) or None
+
+
 def _quote_null() -> str:
     return "NULL"
 
@@ -148,6 +161,12 @@ class DatabaseSchemaEditor(BaseDatabaseSchemaEditor):
         """
         return _quote_value(value)
 
+    def __enter__(self):
+        # The describe snapshot of a previous process may not include DDL
+        # run since, and this DDL makes it stale.
+        self.connection.introspection.skip_describe_snapshot()
+        return super().__enter__()
+
     def execute(self, sql, params=()):
         """
         Execute the given SQL statement, with optional parameters.
@@ -178,8 +197,13 @@ class DatabaseSchemaEditor(BaseDatabaseSchemaEditor):
             else:
                 self.collected_sql.append(sql + ending)
         else:
-            with self.connection.cursor() as cursor:
-                cursor.execute_scheme(sql, params)
+            try:
+                with self.connection.cursor() as cursor:
+                    cursor.execute_scheme(sql, params)
+            finally:
+                self.connection.introspection.invalidate_descriptions(
+                    _get_altered_tables(sql)
+                )
 
     def table_sql(self, model):
         """
@@ -0,0 +1,57 @@
+from contextlib import ExitStack
+from functools import wraps
+
+from django.db import connections
+
+from .transaction import ydb_tx_mode
+
+
+def read_only_view(view_func):
+    """
+    Mark a view whose GET, HEAD and OPTIONS requests only read, so
+    ReadOnlyTransactionMiddleware runs them in a read-only mode.
+    """
+
+    def wrapper_view(*args, **kwargs):
+        return view_func(*args, **kwargs)
+
+    wrapper_view.ydb_read_only = True
+    return wraps(view_func)(wrapper_view)
+
+
+class ReadOnlyTransactionMiddleware:
+    """
+    Run the queries of GET, HEAD and OPTIONS requests to the views marked
+    with read_only_view() on the YDB databases in the read_only_tx_mode
+    backend option ("snapshot_ro" by default), so reads don't take locks.
+
+    The mode is set once the view is resolved and restored when this
+    middleware returns the response. Put it last in MIDDLEWARE, so the
+    writes of the other middleware, e.g. of the session, messages or cache,
+    run in the default mode.
+    """
+
+    safe_methods = ("GET", "HEAD", "OPTIONS")
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with ExitStack() as stack:
+            request._ydb_tx_modes = stack
+            return self.get_response(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if request.method not in self.safe_methods:
+            return
+        if not getattr(view_func, "ydb_read_only", False):
+            return
+        for alias in connections:
+            connection = connections[alias]
+            if connection.vendor == "ydb":
+                request._ydb_tx_modes.enter_context(
+                    ydb_tx_mode(
+                        connection.get_backend_option("read_only_tx_mode"),
+                        using=alias,
+                    )
+                )
@@ -1,11 +1,25 @@
 import logging
+import time
+from collections import Counter
 
+from django.db import NotSupportedError
+from django.db import connections
 from django.db import models
 from django.db import transaction
+from django.db.models import Q
 from django.db.models import QuerySet
+from django.db.models.query import MAX_GET_RESULTS
 from django.db.utils import DatabaseError
 from django.db.utils import IntegrityError
 
+from ..paginator import KeysetPaginator
+from ..signals import batched_chunk_executed
+from ..transaction import check_tx_mode
+from .sql.aio import afetch_all
+from .sql.subqueries import BulkUpdateQuery
+from .sql.subqueries import UpsertQuery
+from .stats import estimated_count
+
 logger = logging.getLogger("django_ydb_backend.models.manager")
 
 
@@ -13,6 +27,18 @@ class YDBManager(models.Manager):
     def get_queryset(self):
         return UpsertQuerySet(self.model, using=self._db)
 
+    def ydb_batched(self, batch_size=None):
+        return self.get_queryset().ydb_batched(batch_size)
+
+    def keyset_page(self, per_page, token=None):
+        return self.get_queryset().keyset_page(per_page, token)
+
+    def estimated_count(self, threshold=None):
+        return self.get_queryset().estimated_count(threshold)
+
+    def ydb_tx_mode(self, mode):
+        return self.get_queryset().ydb_tx_mode(mode)
+
     def upsert(self, obj, conflict_target=None, update_fields=None):
         """
         UPSERT single object (model instance or dict)
@@ -50,16 +76,10 @@ class YDBManager(models.Manager):
         )
 
         # Try native UPSERT first
-        native_upsert_supported = (
-                hasattr(
-                    self._db,
-                    "features"
-                ) and
-                getattr(
-                    self._db.features,
-                    "can_return_upserted_objects",
-                    False
-                )
+        native_upsert_supported = getattr(
+            connections[self.db].features,
+            "can_return_upserted_objects",
+            False
         )
 
         if native_upsert_supported:
@@ -94,48 +114,298 @@ class YDBManager(models.Manager):
         1. Never creates duplicates
         2. Only updates changed fields
         3. Returns persisted objects
+
+        Existing rows of the batch are read with one query and the changes
+        are written with one bulk UPDATE and one bulk INSERT, so the number
+        of round trips doesn't grow with the batch.
         """
+        try:
+            with transaction.atomic(using=self.db):
+                return self._emulated_upsert(objs, conflict_target, update_fields)
+        except IntegrityError:
+            # Handle race condition: some of the rows were inserted
+            # meanwhile. The failed block can't run more queries, so the
+            # rows are read and written again in a new one.
+            with transaction.atomic(using=self.db):
+                return self._emulated_upsert(objs, conflict_target, update_fields)
+
+    def _emulated_upsert(self, objs, conflict_target, update_fields):
         persisted_objs = []
+        to_update = {}
+        to_create = {}
+        existing_objs = self._get_existing_objects(objs, conflict_target)
+
+        for obj in objs:
+            key = self._get_conflict_key(obj, conflict_target)
+            existing = existing_objs.get(key)
 
-        with transaction.atomic(using=self.db):
-            for obj in objs:
-                # Build filter for existing object
-                filter_kwargs = {
-                    field: getattr(obj, field)
-                    for field in conflict_target
-                }
-
-                # Try to get existing object
-                existing = self.filter(**filter_kwargs).first()
-
-                if existing:
-                    # UPDATE existing record if needed
-                    needs_update = False
-                    for field in update_fields:
-                        new_value = getattr(obj, field)
-                        if getattr(existing, field) != new_value:
-                            setattr(existing, field, new_value)
-                            needs_update = True
-
-                    if needs_update:
-                        existing.save(update_fields=update_fields)
-                    persisted_objs.append(existing)
-                else:
-                    # INSERT new record
-                    try:
-                        obj.save(force_insert=True)
-                        persisted_objs.append(obj)
-                    except IntegrityError:
-                        # Handle race condition
-                        existing = self.filter(**filter_kwargs).first()
-                        if not existing:
-                            raise
-                        persisted_objs.append(existing)
+            if existing is None:
+                # INSERT new record, later objects with the same key
+                # update it in memory
+                existing_objs[key] = obj
+                to_create[id(obj)] = obj
+                persisted_objs.append(obj)
+                continue
+
+            # UPDATE existing record if needed
+            needs_update = self._set_update_fields(existing, obj, update_fields)
+            if needs_update and id(existing) not in to_create:
+                to_update[id(existing)] = existing
+            persisted_objs.append(existing)
+
+        if to_update:
+            self.bulk_update(list(to_update.values()), update_fields)
+        if to_create:
+            self.bulk_create(list(to_create.values()))
 
         return persisted_objs
 
+    @staticmethod
+    def _set_update_fields(existing, obj, update_fields):
+        """Copy update_fields of obj to existing, return whether any changed"""
+        changed = False
+        for field in update_fields:
+            new_value = getattr(obj, field)
+            if getattr(existing, field) != new_value:
+                setattr(existing, field, new_value)
+                changed = True
+        return changed
+
+    @staticmethod
+    def _get_conflict_key(obj, conflict_target):
+        return tuple(getattr(obj, field) for field in conflict_target)
+
+    def _get_existing_objects(self, objs, conflict_target):
+        """Fetch the stored rows of objs in one query, keyed by conflict_target"""
+        if len(conflict_target) == 1:
+            field = conflict_target[0]
+            existing = self.filter(
+                **{f"{field}__in": {getattr(obj, field) for obj in objs}}
+            )
+        else:
+            condition = Q()
+            for key in {self._get_conflict_key(obj, conflict_target) for obj in objs}:
+                condition |= Q(**dict(zip(conflict_target, key)))
+            existing = self.filter(condition)
+
+        return {
+            self._get_conflict_key(obj, conflict_target): obj
+            for obj in existing
+        }
+
 
 class UpsertQuerySet(QuerySet):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._ydb_batch_size = None
+
+    def _clone(self):
+        c = super()._clone()
+        c._ydb_batch_size = self._ydb_batch_size
+        return c
+
+    def estimated_count(self, threshold=None):
+        """
+        Return the number of objects, from the table statistics for a large
+        unfiltered queryset, see ydb_backend.models.stats.estimated_count().
+        """
+        return estimated_count(self, threshold)
+
+    def keyset_page(self, per_page, token=None):
+        """
+        Return the page of per_page objects after the row of token, see
+        ydb_backend.paginator.KeysetPaginator.
+        """
+        return KeysetPaginator(self, per_page).get_page(token)
+
+    def ydb_batched(self, batch_size=None):
+        """
+        Make update() and delete() process the matching rows in chunks of
+        batch_size primary keys, each chunk in its own transaction.
+        """
+        if batch_size is not None and batch_size <= 0:
+            raise ValueError("Batch size must be a positive integer.")
+        clone = self._chain()
+        clone._ydb_batch_size = (
+            batch_size
+            or connections[self.db].get_backend_option("bulk_batch_size")
+        )
+        return clone
+
+    def ydb_tx_mode(self, mode):
+        """
+        Run the queries of the queryset in a YDB transaction mode, e.g.
+        "snapshot_ro", see ydb_backend.transaction.ydb_tx_mode().
+        """
+        check_tx_mode(mode)
+        clone = self._chain()
+        clone.query.ydb_tx_mode = mode
+        return clone
+
+    # The async reads of model rows run their SELECT on the asyncio
+    # connection with the native_async option, see
+    # ydb_backend.models.sql.aio. The other async methods use Django's
+    # thread.
+
+    def __aiter__(self):
+        async def generator():
+            await afetch_all(self)
+            for item in self._result_cache:
+                yield item
+
+        return generator()
+
+    def get(self, *args, **kwargs):
+        clone, limit = self._get_clone(*args, **kwargs)
+        clone._fetch_all()
+        return self._get_result(clone, limit)
+
+    async def aget(self, *args, **kwargs):
+        clone, limit = self._get_clone(*args, **kwargs)
+        await afetch_all(clone)
+        return self._get_result(clone, limit)
+
+    def _get_clone(self, *args, **kwargs):
+        """
+        Return the queryset evaluated by get() and its limit, as in
+        QuerySet.get().
+        """
+        if self.query.combinator and (args or kwargs):
+            msg = (
+                f"Calling QuerySet.get(...) with filters after "
+                f"{self.query.combinator}() is not supported."
+            )
+            raise NotSupportedError(msg)
+        clone = self._chain() if self.query.combinator else self.filter(*args, **kwargs)
+        if self.query.can_filter() and not self.query.distinct_fields:
+            clone = clone.order_by()
+        limit = None
+        if (
+            not clone.query.select_for_update
+            or connections[clone.db].features.supports_select_for_update_with_limit
+        ):
+            limit = MAX_GET_RESULTS
+            clone.query.set_limits(high=limit)
+        return clone, limit
+
+    def _get_result(self, clone, limit):
+        num = len(clone._result_cache)
+        if num == 1:
+            return clone._result_cache[0]
+        opts = self.model._meta
+        if not num:
+            msg = f"{opts.object_name} matching query does not exist."
+            raise self.model.DoesNotExist(msg)
+        msg = (
+            f"get() returned more than one {opts.object_name} -- it returned "
+            f"{num if not limit or num < limit else f'more than {limit - 1}'}!"
+        )
+        raise self.model.MultipleObjectsReturned(msg)
+
+    async def afirst(self):
+        return await self._afirst(self._first_queryset("first"))
+
+    async def alast(self):
+        return await self._afirst(self._first_queryset("last"))
+
+    def _first_queryset(self, method):
+        """
+        Return the queryset whose first object first() or last() returns, as
+        in QuerySet.first() and QuerySet.last().
+        """
+        if self.ordered:
+            queryset = self if method == "first" else self.reverse()
+        else:
+            self._check_ordering_first_last_queryset_aggregation(method=method)
+            queryset = self.order_by("pk" if method == "first" else "-pk")
+        return queryset[:1]
+
+    @staticmethod
+    async def _afirst(queryset):
+        await afetch_all(queryset)
+        return queryset._result_cache[0] if queryset._result_cache else None
+
+    def update(self, **kwargs):
+        if self._ydb_batch_size is None:
+            return super().update(**kwargs)
+        if self.query.is_sliced:
+            raise TypeError("Cannot update a query once a slice has been taken.")
+
+        return self._execute_batched(
+            "update",
+            lambda queryset: queryset.update(**kwargs),
+        )
+
+    def delete(self):
+        if self._ydb_batch_size is None:
+            return super().delete()
+        if self.query.is_sliced:
+            raise TypeError("Cannot use 'limit' or 'offset' with delete().")
+        if self._fields is not None:
+            raise TypeError("Cannot call delete() after .values() or .values_list()")
+
+        deleted_per_model = Counter()
+
+        def delete_chunk(queryset):
+            _, deleted = queryset.delete()
+            # A DELETE doesn't report its row count (-1), the rows of the
+            # model are counted from the keys of the chunks.
+            deleted_per_model.update(
+                {label: count for label, count in deleted.items() if count > 0}
+            )
+
+        total = self._execute_batched("delete", delete_chunk)
+        self._result_cache = None
+        deleted_per_model[self.model._meta.label] = total
+        return sum(deleted_per_model.values()), dict(deleted_per_model)
+
+    def _execute_batched(self, operation, execute):
+        """
+        Walk the primary keys of the matching rows in order and call
+        execute() with a queryset of the next chunk of them, until none are
+        left. Return the number of rows processed.
+        """
+        pk_queryset = self.order_by("pk").values_list("pk", flat=True)
+        chunk_queryset = self.model._base_manager.using(self.db)
+
+        total = 0
+        last_pk = None
+        while True:
+            queryset = pk_queryset
+            if last_pk is not None:
+                queryset = queryset.filter(pk__gt=last_pk)
+            pks = list(queryset[:self._ydb_batch_size])
+            if not pks:
+                break
+
+            start = time.monotonic()
+            execute(chunk_queryset.filter(pk__in=pks))
+            duration = time.monotonic() - start
+            total += len(pks)
+
+            batched_chunk_executed.send(
+                sender=self.__class__,
+                model=self.model,
+                operation=operation,
+                rows=len(pks),
+                total=total,
+                duration=duration,
+            )
+            logger.info(
+                "Batched %s of %s: %d rows, %d in total, %.0f rows/s",
+                operation,
+                self.model._meta.label,
+                len(pks),
+                total,
+                len(pks) / duration if duration else 0,
+            )
+
+            if len(pks) < self._ydb_batch_size:
+                break
+            last_pk = pks[-1]
+
+        return total
+
     def bulk_upsert(self, objs, conflict_target, update_fields):
         """
         Native UPSERT implementation using compiler
@@ -146,10 +416,9 @@ class UpsertQuerySet(QuerySet):
             for obj in objs
         ]
 
-        if not hasattr(self.query, "compiler"):
-            raise NotImplementedError("This backend doesn't support native UPSERT")
-
-        compiler = self.query.get_compiler(self.db)
+        query = UpsertQuery(self.model)
+        query.insert_values(self.model._meta.local_concrete_fields, objs)
+        compiler = query.get_compiler(using=self.db)
         if not hasattr(compiler, "execute_upsert"):
             raise NotImplementedError("Compiler doesn't support execute_upsert")
 
@@ -159,3 +428,52 @@ class UpsertQuerySet(QuerySet):
             update_fields=update_fields,
             returning=True  # Ensure we get results back
         )
+
+    def bulk_update(self, objs, fields, batch_size=None):
+        """
+        Update the given fields of objs with UPDATE ON statements that get
+        the rows as one List<Struct> parameter. Return the number of rows
+        updated.
+
+        Invalid arguments, values that are expressions and servers without
+        RETURNING, which is needed to count the updated rows, are handled by
+        the default CASE WHEN implementation.
+        """
+        objs = tuple(objs)
+        if (
+            not connections[self.db].features.can_return_columns_from_insert
+            or not objs
+            or not fields
+            or (batch_size is not None and batch_size <= 0)
+            or any(obj.pk is None for obj in objs)
+        ):
+            return super().bulk_update(objs, fields, batch_size)
+
+        opts = self.model._meta
+        update_fields = [opts.get_field(name) for name in fields]
+        if any(
+            not field.concrete or field.many_to_many or field.primary_key
+            for field in update_fields
+        ) or any(
+            hasattr(getattr(obj, field.attname), "resolve_expression")
+            for obj in objs
+            for field in update_fields
+        ):
+            return super().bulk_update(objs, fields, batch_size)
+
+        for obj in objs:
+            obj._prepare_related_fields_for_save(
+                operation_name="bulk_update", fields=update_fields
+            )
+
+        self._for_write = True
+        batch_size = batch_size or len(objs)
+        rows_updated = 0
+        with transaction.atomic(using=self.db, savepoint=False):
+            for i in range(0, len(objs), batch_size):
+                query = BulkUpdateQuery(self.model)
+                query.insert_values(
+                    [opts.pk, *update_fields], objs[i:i + batch_size], raw=True
+                )
+                rows_updated += query.get_compiler(using=self.db).execute_sql()
+        return rows_updated
@@ -0,0 +1,125 @@
+"""
+Native async queries.
+
+Django runs the async QuerySet methods in a thread with sync_to_async(). With
+the native_async backend option, the methods of YDBManager querysets that
+evaluate the queryset with a single SELECT (async for, aget(), afirst() and
+alast()) compile the SELECT once and await it on the asyncio connection of
+ydb_dbapi. The queryset is then evaluated once with the rows of the
+statement, so the ORM builds its results without any I/O. Querysets with
+prefetch_related() and results truncated by YDB are still evaluated in a
+thread.
+"""
+import contextvars
+import time
+
+from asgiref.sync import sync_to_async
+from django.core.exceptions import SynchronousOnlyOperation
+from django.db import connections
+from django.db.models.sql.constants import MULTI
+
+# The statement of the queryset evaluated in the current context.
+current_statement = contextvars.ContextVar("ydb_async_statement", default=None)
+
+
+class NotReplayable(Exception):  # noqa: N818
+    """The rows of the statement can't be returned to the queryset."""
+
+
+class AsyncStatement:
+    """
+    The SELECT of a queryset, compiled and executed on the asyncio connection
+    and returned to the compiler of the queryset when it is evaluated.
+    """
+
+    def __init__(self, compiler, sql, params):
+        self.compiler = compiler
+        self.sql = sql
+        self.params = params
+        self.rows = []
+        self.replayed = False
+
+    def execute_sql(self, compiler, result_type, chunked_fetch):
+        """
+        Stand in for compiler.execute_sql() while the queryset is evaluated.
+        """
+        if (
+            self.replayed
+            or result_type != MULTI
+            or chunked_fetch
+            or compiler.query is not self.compiler.query
+        ):
+            msg = (
+                "The queryset evaluated with the native_async option ran "
+                "another statement than its SELECT."
+            )
+            raise SynchronousOnlyOperation(msg)
+        self.replayed = True
+
+        # The iterable of the queryset reads the select of its compiler, set
+        # up when the statement was compiled.
+        compiler.select = self.compiler.select
+        compiler.klass_info = self.compiler.klass_info
+        compiler.annotation_col_map = self.compiler.annotation_col_map
+        compiler.col_count = self.compiler.col_count
+        compiler.has_extra_select = self.compiler.has_extra_select
+        if not self.rows:
+            return iter([])
+        rows = self.rows
+        if compiler.has_extra_select:
+            rows = [row[:compiler.col_count] for row in rows]
+        return [rows]
+
+    async def aexecute(self, connection, tx_mode):
+        """
+        Execute the statement on the asyncio connection of the database.
+        """
+        start = time.monotonic()
+        with tx_mode:
+            cursor = await connection.acursor()
+        try:
+            with connection.wrap_database_errors:
+                await cursor.execute(self.sql, self.params)
+            # Truncated results are read again by pages in a thread.
+            if cursor.truncated:
+                raise NotReplayable
+            self.rows = cursor.fetchall()
+        finally:
+            cursor.close()
+        if connection.queries_logged:
+            connection.queries_log.append(
+                {"sql": self.sql, "time": f"{time.monotonic() - start:.3f}"}
+            )
+
+
+def _is_native(queryset):
+    connection = connections[queryset.db]
+    return (
+        connection.get_backend_option("native_async")
+        and connection.get_backend_option("shared_session_pool")
+        and not connection.in_atomic_block
+        and not queryset._prefetch_related_lookups
+    )
+
+
+async def afetch_all(queryset):
+    """
+    Evaluate the queryset, as QuerySet._fetch_all(), with its SELECT executed
+    on the asyncio connection of its database.
+    """
+    if queryset._result_cache is not None:
+        return
+    if _is_native(queryset):
+        compiler = queryset.query.get_compiler(queryset.db)
+        try:
+            statement = await compiler.aexecute_sql()
+        except NotReplayable:
+            pass
+        else:
+            token = current_statement.set(statement)
+            try:
+                queryset._fetch_all()
+            finally:
+                current_statement.reset(token)
+            return
+    await sync_to_async(queryset._fetch_all)()
@@ -0,0 +1,110 @@
+import threading
+from collections import OrderedDict
+from collections import deque
+from collections import namedtuple
+
+CacheInfo = namedtuple("CacheInfo", ["hits", "misses", "maxsize", "currsize"])
+
+DEFAULT_STATEMENT_CACHE_SIZE = 1024
+DEFAULT_STATEMENT_TEXTS_SIZE = 10000
+
+
+class StatementCache:
+    """
+    Bounded LRU cache of compiled YQL statements.
+
+    Keys are structural fingerprints of a compiled query (the query text with
+    Django's ``%s`` placeholders still in it, plus whatever else decides how
+    the parameters are bound), values are whatever the compiler needs to bind
+    a new set of parameters without recompiling the statement.
+    """
+
+    def __init__(self, maxsize=DEFAULT_STATEMENT_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            try:
+                value = self._entries[key]
+            except KeyError:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def info(self):
+        with self._lock:
+            return CacheInfo(self.hits, self.misses, self.maxsize, len(self._entries))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+class StatementTexts:
+    """
+    Count the distinct statement texts this process has compiled.
+
+    With stable statement texts the count levels off once every query shape
+    has been seen; a count that keeps growing means YDB has to compile a new
+    plan for those requests.
+
+    Only the hashes of the last ``maxsize`` distinct texts are kept to
+    recognize a text that was already counted, so past that many distinct
+    texts the count is an upper bound. The last few new texts are kept as
+    samples, to find the queries whose text keeps changing.
+    """
+
+    def __init__(self, maxsize=DEFAULT_STATEMENT_TEXTS_SIZE, samples=10):
+        self.maxsize = maxsize
+        self._count = 0
+        self._hashes = OrderedDict()
+        self._samples = deque(maxlen=samples)
+        self._lock = threading.Lock()
+
+    def add(self, text):
+        key = hash(text)
+        with self._lock:
+            if key in self._hashes:
+                self._hashes.move_to_end(key)
+                return
+            self._count += 1
+            self._samples.append(text)
+            self._hashes[key] = None
+            while len(self._hashes) > self.maxsize:
+                self._hashes.popitem(last=False)
+
+    def count(self):
+        with self._lock:
+            return self._count
+
+    def samples(self):
+        """Return the last new statement texts, the most recent last."""
+        with self._lock:
+            return list(self._samples)
+
+    def clear(self):
+        with self._lock:
+            self._count = 0
+            self._hashes.clear()
+            self._samples.clear()
+
+
+statement_cache = StatementCache()
+statement_texts = StatementTexts()
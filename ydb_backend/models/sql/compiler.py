@@ -1,4 +1,14 @@
+import functools
+import logging
 import re
+import time
+from collections import namedtuple
+from contextlib import nullcontext
+from datetime import date
+from datetime import datetime
+from datetime import timedelta
+from decimal import Decimal
+from uuid import UUID
 
 import ydb
 from django.core.exceptions import EmptyResultSet
@@ -6,12 +16,29 @@ from django.core.exceptions import FieldError
 from django.core.exceptions import FullResultSet
 from django.db import NotSupportedError
 from django.db import models
-from django.db.models.expressions import RawSQL
+from django.db.models.expressions import Col
+from django.db.models.expressions import Value
+from django.db.models.lookups import In
+from django.db.models.lookups import Lookup
+from django.db.models.lookups import YearLookup
 from django.db.models.sql import compiler
 from django.db.models.sql.compiler import SQLAggregateCompiler
 from django.db.models.sql.compiler import SQLCompiler
+from django.db.models.sql.constants import GET_ITERATOR_CHUNK_SIZE
+from django.db.models.sql.constants import MULTI
 from django.db.models.sql.query import Query
 
+from ...retry import retry_read
+from ...signals import bulk_chunk_executed
+from ...signals import paged_read_finished
+from ...transaction import ydb_tx_mode
+from .aio import AsyncStatement
+from .aio import current_statement
+from .cache import statement_cache
+from .cache import statement_texts
+
+logger = logging.getLogger("django_ydb_backend.models.sql.compiler")
+
 _ydb_types = {
     "AutoField": ydb.PrimitiveType.Int32,
     "BigAutoField": ydb.PrimitiveType.Int64,
@@ -43,87 +70,301 @@ _ydb_types = {
 }
 
 
-def _extract_column_names(sql_text):
-    column_pattern = re.compile(r"""
-            (?:`[^`]+`\.`[^`]+`(?!\w)
-            |`[^`]+`(?!\w)
-            )(?=(?:\s|[),;]|$))
-        """, re.VERBOSE)
-
-    columns = []
-    for m in column_pattern.finditer(sql_text):
-        col_name = m.group()
-
-        if "." in col_name:
-            col_name = col_name.split(".")[-1]
-        col_name = col_name.strip("`")
-
-        columns.append((m.start(), col_name))
-
-    placeholders = [m.start() for m in re.finditer(r"%s", sql_text)]
-
-    result = []
-    for ph_pos in placeholders:
-        last_column = None
-        for col_pos, col_name in columns:
-            if col_pos < ph_pos:
-                last_column = col_name
-            else:
-                break
-        result.append(last_column)
+_python_ydb_types = [
+    # bool is a subclass of int and datetime of date, so they go first.
+    (bool, ydb.PrimitiveType.Bool),
+    (int, ydb.PrimitiveType.Int64),
+    (float, ydb.PrimitiveType.Double),
+    (Decimal, ydb.DecimalType(precision=22, scale=9)),
+    (str, ydb.PrimitiveType.Utf8),
+    (bytes, ydb.PrimitiveType.String),
+    (datetime, ydb.PrimitiveType.Datetime),
+    (date, ydb.PrimitiveType.Date),
+    (timedelta, ydb.PrimitiveType.Interval),
+    (UUID, ydb.PrimitiveType.UUID),
+]
+
+# Lookups whose right-hand side is a pattern string rather than a value of
+# the left-hand side field.
+_pattern_lookups = {
+    "iexact",
+    "contains",
+    "icontains",
+    "startswith",
+    "istartswith",
+    "endswith",
+    "iendswith",
+    "regex",
+    "iregex",
+}
 
-    return result
+_TypedParam = namedtuple("_TypedParam", ["value", "ydb_type"])
+
+
+def _get_field_ydb_type(field):
+    while field.is_relation and field.target_field is not field:
+        field = field.target_field
+    return _ydb_types.get(field.get_internal_type())
+
+
+def _get_value_ydb_type(value):
+    for type_, ydb_type in _python_ydb_types:
+        if isinstance(value, type_):
+            return ydb_type
+    return None
+
+
+def _get_output_field(expression):
+    try:
+        return expression.output_field
+    except (AttributeError, FieldError):
+        return None
+
+
+def _get_node_ydb_type(node):
+    """
+    Return the YDB type of the parameters ``node`` puts into the SQL by
+    itself (and not through a compiled child), or None if unknown.
+
+    Only a lookup, whose own parameters are compared with its left-hand
+    side, and a value know the field of their parameters. The output field
+    of other nodes, e.g. the Bool of a WHERE clause or the field of a
+    RawSQL(), says nothing about their parameters.
+    """
+    if isinstance(node, Lookup):
+        if node.lookup_name in _pattern_lookups:
+            return ydb.PrimitiveType.Utf8
+        lhs = node.lhs
+        if isinstance(node, YearLookup) and node.rhs_is_direct_value():
+            # The year bounds are compared with the original date column.
+            lhs = lhs.lhs
+        field = _get_output_field(lhs)
+    elif isinstance(node, Value):
+        field = _get_output_field(node)
+    else:
+        return None
+
+    if field is None:
+        return None
+    return _get_field_ydb_type(field)
+
+
+def _type_params(node, params):
+    """
+    Attach the YDB type to the parameters ``node`` compiled into, keeping
+    the types already attached by the compiled children.
+
+    Parameters of unknown type are marked too, with a None type, so the
+    nodes compiling ``node`` don't type them; they are typed from their
+    Python value when bound.
+    """
+    if all(isinstance(param, _TypedParam) for param in params):
+        return params
+    ydb_type = _get_node_ydb_type(node)
+    return [
+        param if isinstance(param, _TypedParam) else _TypedParam(param, ydb_type)
+        for param in params
+    ]
+
+
+def _to_ydb_param(param):
+    """
+    Return the value to send and its YDB type, or None as the type if it is
+    left for the driver to infer from the value.
+    """
+    value, ydb_type = param if isinstance(param, _TypedParam) else (param, None)
+    if ydb_type is None:
+        ydb_type = _get_value_ydb_type(value)
+
+    if ydb_type is None:
+        return value, None
+    if value is None:
+        return value, ydb.OptionalType(ydb_type)
+    return _to_ydb_value(value, ydb_type), ydb_type
+
+
+def _to_ydb_value(value, ydb_type):
+    if ydb_type is ydb.PrimitiveType.Datetime and isinstance(value, datetime):
+        return int(value.timestamp())
+    return value
+
+
+_sql_tokens = re.compile(
+    r"""
+    (?P<literal>
+        '(?:[^'\\]|\\.|'')*'  # string literal
+        |"(?:[^"\\]|\\.)*"    # string literal
+        |`[^`]*`              # quoted identifier
+        |--[^\n]*             # line comment
+        |/\*.*?\*/            # block comment
+    )
+    |(?P<placeholder>%s)
+    |(?P<percent>%%)
+    """,
+    re.VERBOSE | re.DOTALL,
+)
 
 
 def _replace_placeholders(sql):
+    """
+    Rewrite Django's ``%s`` placeholders into ``$element_N`` parameters in a
+    single pass. ``%%`` becomes ``%``; literals, quoted identifiers and
+    comments are copied as is. Return the YQL text and the parameter names
+    in placeholder order.
+    """
+    parts = []
     placeholder_rows = []
-    counter = 1
-
-    while "%s" in sql:
-        sql = sql.replace("%s", f"${'element_' + str(counter)}", 1)
-        placeholder_rows.append("$element_" + str(counter))
-        counter += 1
+    position = 0
+
+    for match in _sql_tokens.finditer(sql):
+        kind = match.lastgroup
+        if kind == "literal":
+            continue
+        parts.append(sql[position:match.start()])
+        if kind == "placeholder":
+            name = f"$element_{len(placeholder_rows) + 1}"
+            placeholder_rows.append(name)
+            parts.append(name)
+        else:
+            parts.append("%")
+        position = match.end()
+
+    parts.append(sql[position:])
+    return "".join(parts), placeholder_rows
+
+
+def _bind_statement(sql, params):
+    """
+    Turn Django's ``%s`` SQL into YQL with typed ``$element_N`` parameters.
+
+    Every typed parameter gets a DECLARE, so the same query shape with the
+    same parameter types always produces byte-identical text and YDB can
+    reuse the compiled plan. The text only depends on the query and the
+    types, so it is cached and repeated query shapes only bind new values.
+    """
+    params = [_to_ydb_param(param) for param in params]
+    key = (sql, *(str(ydb_type) for _, ydb_type in params))
+    plan = statement_cache.get(key)
+    if plan is None:
+        yql, placeholder_rows = _replace_placeholders(sql)
+        declares = [
+            f"DECLARE {name} as {ydb_type};"
+            for name, (_, ydb_type) in zip(placeholder_rows, params)
+            if ydb_type is not None
+        ]
+        plan = (" ".join([*declares, yql]), placeholder_rows)
+        statement_cache.set(key, plan)
+        statement_texts.add(plan[0])
+
+    yql, placeholder_rows = plan
+    return yql, {
+        name: value if ydb_type is None else (value, ydb_type)
+        for name, (value, ydb_type) in zip(placeholder_rows, params)
+    }
+
+
+class TypedParamsMixin:
+    """
+    Carry the YDB type of every compiled parameter alongside its value.
+
+    The type comes from the output field of the expression that produced the
+    parameter, so placeholders are bound without looking at the SQL text.
+    Subqueries return Django's ``%s`` SQL with typed parameters and are bound
+    as part of the outermost statement.
+    """
+
+    def compile(self, node):
+        if isinstance(node, In) and node.rhs_is_direct_value():
+            return self._compile_in_list(node)
+        sql, params = super().compile(node)
+        return sql, _type_params(node, params)
+
+    def _compile_in_list(self, node):
+        """
+        Bind the values of an ``__in`` lookup as a single List<T> parameter,
+        so the statement text doesn't depend on the number of values.
+        """
+        ydb_type = _get_node_ydb_type(node)
+        lhs_sql, lhs_params = node.process_lhs(self, self.connection)
+        rhs_sql, rhs_params = node.process_rhs(self, self.connection)
+
+        placeholders = f"({', '.join(['%s'] * len(rhs_params))})"
+        if (
+            ydb_type is not None
+            and rhs_sql == placeholders
+            and not any(isinstance(param, _TypedParam) for param in rhs_params)
+        ):
+            values = [_to_ydb_value(value, ydb_type) for value in rhs_params]
+            rhs_sql = "%s"
+            rhs_params = [_TypedParam(values, ydb.ListType(ydb_type))]
 
-    return sql, placeholder_rows
+        sql = f"{lhs_sql} {node.get_rhs_op(self.connection, rhs_sql)}"
+        return sql, _type_params(node, [*lhs_params, *rhs_params])
 
 
-def _generate_params_for_update(placeholder_rows, columns, field_types, params):
-    model_types = []
+def _datetime_to_timestamp(value):
+    return None if value is None else int(value.timestamp())
 
-    for column in columns:
-        if column in field_types:
-            model_types.append(field_types[column])
 
-    modified_params = {}
+_value_converters = {
+    "DateTimeField": _datetime_to_timestamp,
+}
 
-    for i in range(len(placeholder_rows)):
-        if str(model_types[i]) == "DateTimeField":
-            modified_params[placeholder_rows[i]] = (
-                int(params[i].timestamp()),
-                _ydb_types[model_types[i]]
-            )
-        else:
-            modified_params[placeholder_rows[i]] = (
-                params[i],
-                _ydb_types[model_types[i]]
-            )
 
-    return modified_params
+@functools.lru_cache(maxsize=256)
+def _get_data_plan(fields):
+    """
+    Return the struct member name and the value converter (or None) of each
+    field, computed once per field list.
+    """
+    return tuple(
+        (field.column, _value_converters.get(field.get_internal_type()))
+        for field in fields
+    )
 
 
 def _get_data(fields, param_rows):
-    result = []
-
-    for i in range(len(param_rows)):
-        struct = {}
-        for j in range(len(fields)):
-            if fields[j].get_internal_type() == "DateTimeField":
-                struct[fields[j].column] = int(param_rows[i][j].timestamp())
-            else:
-                struct[fields[j].column] = param_rows[i][j]
-        result.append(struct)
-
-    return result
+    plan = _get_data_plan(tuple(fields))
+    columns = [column for column, _ in plan]
+
+    if all(converter is None for _, converter in plan):
+        return [dict(zip(columns, row)) for row in param_rows]
+
+    # Convert column by column, so each converter is looked up only once.
+    values = [
+        column_values if converter is None else map(converter, column_values)
+        for (_, converter), column_values in zip(plan, zip(*param_rows))
+    ]
+    return [dict(zip(columns, row)) for row in zip(*values)]
+
+
+def _estimate_size(value):
+    if value is None:
+        return 1
+    if isinstance(value, str):
+        return len(value)
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    return 16
+
+
+def _split_rows(param_rows, max_rows, max_bytes):
+    """
+    Split ``param_rows`` into chunks of at most ``max_rows`` rows and about
+    ``max_bytes`` bytes of estimated payload. Yield (start, end, size) for
+    each chunk; a row bigger than ``max_bytes`` makes a chunk of its own.
+    """
+    start = 0
+    size = 0
+    for i, row in enumerate(param_rows):
+        row_size = sum(_estimate_size(value) for value in row)
+        if i > start and (i - start >= max_rows or size + row_size > max_bytes):
+            yield start, i, size
+            start = i
+            size = 0
+        size += row_size
+    if start < len(param_rows):
+        yield start, len(param_rows), size
 
 
 def _get_data_type(fields):
@@ -133,7 +374,22 @@ def _get_data_type(fields):
     return ydb.ListType(struct_type)
 
 
-class SQLCompiler(SQLCompiler):
+def _tx_mode(compiler):
+    """
+    Return a context manager that runs the statements of the compiled query
+    in the mode selected with QuerySet.ydb_tx_mode(), if any.
+    """
+    query = compiler.query
+    while query is not None:
+        mode = getattr(query, "ydb_tx_mode", None)
+        if mode is not None:
+            return ydb_tx_mode(mode, using=compiler.connection.alias)
+        # The mode of an aggregate is set on the query it aggregates.
+        query = getattr(query, "inner_query", None)
+    return nullcontext()
+
+
+class SQLCompiler(TypedParamsMixin, SQLCompiler):
     def as_sql(self, with_limits=True, with_col_aliases=False):
         """
         Create the SQL for this query. Return the SQL string and list of
@@ -144,7 +400,6 @@ class SQLCompiler(SQLCompiler):
         """
 
         refcounts_before = self.query.alias_refcount.copy()
-        columns = []
         try:
             combinator = self.query.combinator
             extra_select, order_by, group_by = self.pre_sql_setup(
@@ -158,6 +413,9 @@ class SQLCompiler(SQLCompiler):
                 if not getattr(features, f"supports_select_{combinator}"):
                     msg = f"{combinator} is not supported on this database backend."
                     raise NotSupportedError(msg)
+                # The combined parts are bound as part of this statement.
+                for query in self.query.combined_queries:
+                    query.subquery = True
                 result, params = self.get_combinator_sql(
                     combinator, self.query.combinator_all
                 )
@@ -201,7 +459,6 @@ class SQLCompiler(SQLCompiler):
 
                 out_cols = []
                 for _, (s_sql, s_params), alias in self.select + extra_select:
-                    columns = columns + _extract_column_names(s_sql)
                     if alias:
                         s_sql = f"{s_sql} AS {self.connection.ops.quote_name(alias)}"  # noqa: PLW2901
                     params.extend(s_params)
@@ -218,8 +475,6 @@ class SQLCompiler(SQLCompiler):
                 if where:
                     result.append(f"WHERE {where}")
                     params.extend(w_params)
-                    if len(where) > 0:
-                        columns = columns + _extract_column_names(where)
 
                 grouping = []
                 for g_sql, g_params in group_by:
@@ -239,8 +494,6 @@ class SQLCompiler(SQLCompiler):
                         result.extend(self.connection.ops.force_group_by())
                     result.append(f"HAVING {having}")
                     params.extend(h_params)
-                    if len(having) > 0:
-                        columns = columns + _extract_column_names(having)
 
             if self.query.explain_info:
                 result.insert(
@@ -302,22 +555,178 @@ class SQLCompiler(SQLCompiler):
                 return sql, params
 
             sql, params = " ".join(result), tuple(params)
-            sql, placeholder_rows = _replace_placeholders(sql)
+            if self.query.subquery:
+                return sql, params
+            return _bind_statement(sql, params)
+        finally:
+            # Finally do cleanup - get rid of the joins we created above.
+            self.query.reset_refcounts(refcounts_before)
 
-            field_types = {
-                field.name: field.get_internal_type()
-                for field in self.query.model._meta.get_fields()
-                if hasattr(field, "name")
-            }
+    def execute_sql(
+        self, result_type=MULTI, chunked_fetch=False, chunk_size=GET_ITERATOR_CHUNK_SIZE
+    ):
+        statement = current_statement.get()
+        if statement is not None:
+            return statement.execute_sql(self, result_type, chunked_fetch)
+        if result_type != MULTI:
+            with _tx_mode(self):
+                return retry_read(
+                    self.connection,
+                    super().execute_sql,
+                    result_type,
+                    chunked_fetch,
+                    chunk_size,
+                    sender=self.__class__,
+                )
+
+        try:
+            sql, params = self.as_sql()
+        except EmptyResultSet:
+            return iter([])
+        if not sql:
+            return iter([])
+
+        if chunked_fetch:
+            pk_index = self._get_keyset_pk_index()
+            if pk_index is not None:
+                return self._execute_keyset(pk_index, chunk_size)
+
+        rows, truncated = retry_read(
+            self.connection, self._fetch_rows, sql, params, sender=self.__class__
+        )
+        if truncated:
+            return self._continue_truncated(rows)
+        if self.has_extra_select:
+            rows = [row[:self.col_count] for row in rows]
+        return [rows]
 
-            modified_params = _generate_params_for_update(
-                placeholder_rows, columns, field_types, params
+    async def aexecute_sql(self):
+        """
+        Compile the query and execute it on the asyncio connection. Return the
+        statement whose rows execute_sql() returns while the queryset is
+        evaluated, see ydb_backend.models.sql.aio.
+        """
+        try:
+            sql, params = self.as_sql()
+        except EmptyResultSet:
+            sql, params = None, ()
+        statement = AsyncStatement(self, sql, params)
+        if sql:
+            await statement.aexecute(self.connection, _tx_mode(self))
+        return statement
+
+    def _fetch_rows(self, sql, params):
+        """
+        Return the rows of the statement and whether YDB truncated them.
+        """
+        with _tx_mode(self), self.connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return cursor.fetchall(), getattr(cursor, "truncated", False)
+
+    def _continue_truncated(self, rows):
+        """
+        Read the rest of a result that YDB truncated at len(rows) rows with
+        primary key keyset pages of the same size.
+        """
+        opts = self.query.get_meta()
+        pk_index = self._get_keyset_pk_index()
+        if pk_index is None:
+            logger.warning(
+                "The result of a query on %s was truncated at %d rows and "
+                "can't be continued, it isn't ordered by the primary key.",
+                opts.label,
+                len(rows),
+            )
+            if self.has_extra_select:
+                rows = [row[:self.col_count] for row in rows]
+            return [rows]
+
+        if self.query.order_by or (self.query.default_ordering and opts.ordering):
+            # The rows are the first page of the result.
+            pages = self._execute_keyset(
+                pk_index, len(rows), after=rows[-1][pk_index], read=(1, len(rows))
             )
+            if self.has_extra_select:
+                rows = [row[:self.col_count] for row in rows]
+            return [rows, *pages]
 
-            return sql, modified_params
-        finally:
-            # Finally do cleanup - get rid of the joins we created above.
-            self.query.reset_refcounts(refcounts_before)
+        # Any rows could have been returned, read the result from the start.
+        return list(self._execute_keyset(pk_index, len(rows), read=(1, 0)))
+
+    def _get_keyset_pk_index(self):
+        """
+        Return the position of the primary key in the selected columns if
+        the query can be read in primary key order page by page, None
+        otherwise.
+        """
+        query = self.query
+        opts = query.get_meta()
+        pk_ordering = ((), ("pk",), (opts.pk.name,), (opts.pk.attname,))
+        if (
+            query.is_sliced
+            or query.distinct
+            or query.combinator
+            or query.group_by is not None
+            or query.select_for_update
+            or query.extra_order_by
+            or query.order_by not in pk_ordering
+            or (
+                not query.order_by
+                and query.default_ordering
+                and tuple(opts.ordering) not in pk_ordering
+            )
+        ):
+            return None
+
+        for index, (expression, _, _) in enumerate(self.select):
+            if (
+                isinstance(expression, Col)
+                and expression.target == opts.pk
+                and expression.alias == query.base_table
+            ):
+                return index
+        return None
+
+    def _execute_keyset(self, pk_index, page_size, after=None, read=None):
+        """
+        Yield the rows of the query in pages of page_size rows, each page a
+        separate query for the rows after the last primary key of the
+        previous one. Only one page is held in memory at a time.
+
+        read is the number of pages and rows already read when continuing a
+        truncated result.
+        """
+        pages, total = read or (0, 0)
+        while True:
+            query = self.query.chain()
+            query.clear_ordering(force=True)
+            query.add_ordering("pk")
+            if after is not None:
+                query.add_filter("pk__gt", after)
+            query.set_limits(high=page_size)
+            sql, params = query.get_compiler(using=self.using).as_sql()
+
+            rows, _ = retry_read(
+                self.connection, self._fetch_rows, sql, params, sender=self.__class__
+            )
+            pages += 1
+            total += len(rows)
+
+            if rows:
+                after = rows[-1][pk_index]
+                if self.has_extra_select:
+                    rows = [row[:self.col_count] for row in rows]
+                yield rows
+            if len(rows) < page_size:
+                break
+
+        paged_read_finished.send(
+            sender=self.__class__,
+            model=self.query.model,
+            pages=pages,
+            rows=total,
+            truncated=read is not None,
+        )
 
 
 class BaseSQLWriteCompiler(compiler.SQLInsertCompiler):
@@ -334,12 +743,22 @@ class BaseSQLWriteCompiler(compiler.SQLInsertCompiler):
         ]
         in_ = f"{', '.join(field_types)}"
 
-        return [
+        sql = [
             f"DECLARE $in_ as List<Struct<{in_}>>;",
             f"{self._get_statement()} {qn(opts.db_table)}",
             f"({', '.join(qn(f.column) for f in fields)})",
-            f"SELECT {', '.join(qn(f.column) for f in fields)} FROM AS_TABLE($in_);"
+            self._get_source(fields),
         ]
+        if self.returning_fields:
+            sql.append(
+                f"RETURNING {', '.join(qn(f.column) for f in self.returning_fields)}"
+            )
+        sql[-1] += ";"
+        return sql
+
+    def _get_source(self, fields):
+        qn = self.connection.ops.quote_name
+        return f"SELECT {', '.join(qn(f.column) for f in fields)} FROM AS_TABLE($in_)"
 
     def _prepare_params(self):
         opts = self.query.get_meta()
@@ -360,25 +779,48 @@ class BaseSQLWriteCompiler(compiler.SQLInsertCompiler):
             fields = [None]
 
         _, param_rows = self.assemble_as_sql(fields, value_rows)
-        return {
-            "$in_": (
-                _get_data(fields, param_rows),
-                _get_data_type(fields)
-            )
-        }
+        data_type = _get_data_type(fields)
+        max_rows = self.connection.get_backend_option("bulk_batch_size")
+        max_bytes = self.connection.get_backend_option("bulk_batch_bytes")
+
+        for start, end, size in _split_rows(param_rows, max_rows, max_bytes):
+            params = {"$in_": (_get_data(fields, param_rows[start:end]), data_type)}
+            yield params, end - start, size
 
     def _get_statement(self):
         raise NotImplementedError("Subclasses must implement this method")
 
+    def _get_chunks(self):
+        sql = " ".join(self._prepare_sql_statement())
+        statement_texts.add(sql)
+        for params, rows, size in self._prepare_params():
+            yield sql, params, rows, size
+
     def as_sql(self):
-        sql = self._prepare_sql_statement()
-        params = self._prepare_params()
-        return [(" ".join(sql), params)]
+        return [(sql, params) for sql, params, _, _ in self._get_chunks()]
+
+    def _execute_chunks(self, cursor):
+        rows = []
+        for sql, params, chunk_rows, size in self._get_chunks():
+            start = time.monotonic()
+            cursor.execute_scheme(sql, params)
+            if self.returning_fields:
+                rows.extend(cursor.fetchall())
+            bulk_chunk_executed.send(
+                sender=self.__class__,
+                model=self.query.model,
+                rows=chunk_rows,
+                size=size,
+                duration=time.monotonic() - start,
+            )
+        return rows
 
     def execute_sql(self, returning_fields=None):
         opts = self.query.get_meta()
+        num_objects = len(self.query.objs)
 
         if (returning_fields is None
+                and num_objects == 1
                 and hasattr(opts, "pk")
                 and isinstance(opts.pk, (
                         models.AutoField,
@@ -387,15 +829,23 @@ class BaseSQLWriteCompiler(compiler.SQLInsertCompiler):
                 ))):
             returning_fields = [opts.pk]
 
+        features = self.connection.features
+        if returning_fields and (
+            features.can_return_rows_from_bulk_insert
+            if num_objects > 1
+            else features.can_return_columns_from_insert
+        ):
+            self.returning_fields = returning_fields
+
         with self.connection.cursor() as cursor:
-            for sql, params in self.as_sql():
-                cursor.execute_scheme(sql, params)
+            rows = self._execute_chunks(cursor)
 
             if not returning_fields:
                 return []
 
-            num_objects = len(self.query.objs)
-            if num_objects > 1:
+            # RETURNING is only used for a single object, the returned row
+            # is its row.
+            if not self.returning_fields:
                 last_id = self.connection.ops.last_insert_id(
                     cursor,
                     opts.db_table,
@@ -403,14 +853,6 @@ class BaseSQLWriteCompiler(compiler.SQLInsertCompiler):
                 )
                 first_id = last_id - num_objects + 1
                 rows = [(idx,) for idx in range(first_id, last_id + 1)]
-            else:
-                rows = [(
-                    self.connection.ops.last_insert_id(
-                        cursor,
-                        opts.db_table,
-                        opts.pk.column
-                    ),
-                )]
 
             cols = [field.get_col(opts.db_table) for field in returning_fields]
             converters = self.get_converters(cols)
@@ -429,37 +871,160 @@ class SQLInsertCompiler(BaseSQLWriteCompiler):
 
 
 class SQLUpsertCompiler(BaseSQLWriteCompiler):
+    # Fields that are overwritten in rows that already exist. None means all
+    # of them, the other fields keep their stored values.
+    update_fields = None
+
     def _get_statement(self):
         return self.connection.ops.upsert_statement(
             on_conflict=self.query.on_conflict,
         )
 
+    def _get_source(self, fields):
+        if self.update_fields is None:
+            return super()._get_source(fields)
 
-class SQLDeleteCompiler(compiler.SQLDeleteCompiler):
-    def _as_sql(self, query):
+        qn = self.connection.ops.quote_name
+        pk = qn(self.query.get_meta().pk.column)
         columns = []
+        for field in fields:
+            column = qn(field.column)
+            if field.primary_key or field in self.update_fields:
+                columns.append(f"src.{column} AS {column}")
+            elif field.null:
+                columns.append(
+                    f"IF(dst.{pk} IS NULL, src.{column}, dst.{column}) AS {column}"
+                )
+            else:
+                # A NOT NULL column of an existing row is never NULL, and
+                # COALESCE keeps the type non-optional.
+                columns.append(f"COALESCE(dst.{column}, src.{column}) AS {column}")
+
+        return (
+            f"SELECT {', '.join(columns)} FROM AS_TABLE($in_) AS src "
+            f"LEFT JOIN {qn(self.query.get_meta().db_table)} AS dst "
+            f"ON src.{pk} = dst.{pk}"
+        )
+
+    def execute_upsert(self, objs, conflict_target, update_fields, returning=False):
+        """
+        UPSERT the objects of the query with one statement per chunk.
+
+        New rows are inserted with every field, existing rows only get
+        update_fields overwritten. Return objs; with returning=True the
+        fields of existing rows that weren't updated are read back from the
+        database when the server supports RETURNING.
+        """
+        opts = self.query.get_meta()
+        if [opts.get_field(name) for name in conflict_target] != [opts.pk]:
+            raise NotImplementedError(
+                "UPSERT resolves conflicts only on the primary key"
+            )
+        if any(obj.pk is None for obj in objs):
+            raise NotImplementedError("UPSERT requires the primary key of each object")
+
+        fields = self.query.fields
+        update_fields = {opts.get_field(name) for name in update_fields}
+        kept_fields = [
+            field for field in fields
+            if not field.primary_key and field not in update_fields
+        ]
+        if kept_fields:
+            self.update_fields = update_fields
+            # The returned rows are matched to the objects by primary key.
+            if returning and self.connection.features.can_return_columns_from_insert:
+                self.returning_fields = fields
+
+        with self.connection.cursor() as cursor:
+            rows = self._execute_chunks(cursor)
+
+        if self.returning_fields:
+            cols = [field.get_col(opts.db_table) for field in fields]
+            converters = self.get_converters(cols)
+            if converters:
+                rows = self.apply_converters(rows, converters)
+
+            pk_index = fields.index(opts.pk)
+            rows = {row[pk_index]: row for row in rows}
+            for obj in objs:
+                row = rows.get(obj.pk)
+                if row is None:
+                    continue
+                for field in kept_fields:
+                    setattr(obj, field.attname, row[fields.index(field)])
+
+        return objs
+
+
+class SQLBulkUpdateCompiler(BaseSQLWriteCompiler):
+    def _get_statement(self):
+        return "UPDATE"
+
+    def _prepare_sql_statement(self):
+        sql = super()._prepare_sql_statement()
+        sql[1] += " ON"
+        return sql
+
+    def execute_sql(self, returning_fields=None):
+        # UPDATE ON skips the keys without a stored row, the updated rows are
+        # counted from the returned keys.
+        self.returning_fields = [self.query.get_meta().pk]
+        with self.connection.cursor() as cursor:
+            return len(self._execute_chunks(cursor))
+
+
+class SQLDeleteCompiler(TypedParamsMixin, compiler.SQLDeleteCompiler):
+    def _as_sql(self, query):
         delete = f"DELETE FROM {self.quote_name_unless_alias(query.base_table)}"
 
+        key_list = self._get_key_list(query)
+        if key_list is not None:
+            return self._as_delete_on_keys(query, key_list)
+
         try:
             where, params = self.compile(query.where)
-            if len(where) > 0:
-                columns = columns + _extract_column_names(where)
         except FullResultSet:
             return delete, ()
         sql, params = f"{delete} WHERE {where}", tuple(params)
-        sql, placeholder_rows = _replace_placeholders(sql)
+        return _bind_statement(sql, params)
 
-        field_types = {
-            field.name: field.get_internal_type()
-            for field in self.query.model._meta.get_fields()
-            if hasattr(field, "name")
-        }
+    def _get_key_list(self, query):
+        """
+        Return the bound List<T> parameter if the query only filters the
+        primary key by a list of values, e.g. the batches of a deletion
+        collector, None otherwise.
+        """
+        where = query.where
+        if where.negated or len(where.children) != 1:
+            return None
+        lookup = where.children[0]
+        if not (
+            isinstance(lookup, In)
+            and lookup.rhs_is_direct_value()
+            and getattr(lookup.lhs, "target", None) == query.get_meta().pk
+        ):
+            return None
+        _, params = self._compile_in_list(lookup)
+        if len(params) != 1 or not isinstance(params[0].ydb_type, ydb.ListType):
+            return None
+        return params[0]
 
-        modified_params = _generate_params_for_update(
-            placeholder_rows, columns, field_types, params
+    def _as_delete_on_keys(self, query, key_list):
+        """
+        Delete the rows by sending their keys as a single List<Struct>
+        parameter, the statement text doesn't depend on the number of keys.
+        """
+        pk = query.get_meta().pk
+        ydb_type = _get_field_ydb_type(pk)
+        keys_type = ydb.ListType(ydb.StructType().add_member(pk.column, ydb_type))
+        sql = (
+            f"DECLARE $keys as {keys_type}; "
+            f"DELETE FROM {self.quote_name_unless_alias(query.base_table)} "
+            f"ON SELECT * FROM AS_TABLE($keys);"
         )
-
-        return sql, modified_params
+        statement_texts.add(sql)
+        keys = [{pk.column: value} for value in key_list.value]
+        return sql, {"$keys": (keys, keys_type)}
 
     def as_sql(self):
         """
@@ -476,17 +1041,15 @@ class SQLDeleteCompiler(compiler.SQLDeleteCompiler):
         innerq.clear_select_clause()
         pk = self.query.model._meta.pk
         innerq.select = [pk.get_col(self.query.get_initial_alias())]
-        outerq = Query(self.query.model)
-        if not self.connection.features.update_can_self_select:
-            # Force the materialization of the inner query to allow reference
-            # to the target table on MySQL.
-            sql, params = innerq.get_compiler(connection=self.connection).as_sql()
-            innerq = RawSQL(f"SELECT * FROM ({sql}) subquery", params) # noqa: S611
-        outerq.add_filter("pk__in", innerq)
-        return self._as_sql(outerq)
+        innerq.subquery = True
+        # DELETE ON takes the keys of the rows to delete from the inner query,
+        # so it doesn't have to be wrapped in a pk__in filter.
+        sql, params = innerq.get_compiler(connection=self.connection).as_sql()
+        table = self.connection.ops.quote_name(self.query.get_meta().db_table)
+        return _bind_statement(f"DELETE FROM {table} ON {sql}", params)
 
 
-class SQLUpdateCompiler(compiler.SQLUpdateCompiler):
+class SQLUpdateCompiler(TypedParamsMixin, compiler.SQLUpdateCompiler):
     def as_sql(self):
         """
         Create the SQL for this query. Return the SQL string and list of
@@ -538,7 +1101,7 @@ class SQLUpdateCompiler(compiler.SQLUpdateCompiler):
                 update_params.extend(params)
             elif val is not None:
                 values.append(f"{qn(name)} = {placeholder}")
-                update_params.append(val)
+                update_params.append(_TypedParam(val, _get_field_ydb_type(field)))
             else:
                 values.append(f"{qn(name)} = NULL")
         table = self.query.base_table
@@ -548,33 +1111,15 @@ class SQLUpdateCompiler(compiler.SQLUpdateCompiler):
             ", ".join(values),
         ]
 
-        columns = []
-
-        for item in values:
-            columns.extend(_extract_column_names(item))
-
         try:
             where, params = self.compile(self.query.where)
-            if len(where) > 0:
-                columns = columns + _extract_column_names(where)
         except FullResultSet:
             params = []
         else:
             result.append(f"WHERE {where}")
 
         sql, params = " ".join(result), tuple(update_params + params)
-        sql, placeholder_rows = _replace_placeholders(sql)
-
-        field_types = {
-            field.name: field.get_internal_type()
-            for field in self.query.model._meta.get_fields()
-            if hasattr(field, "name")
-        }
-
-        modified_params = _generate_params_for_update(
-            placeholder_rows, columns, field_types, params
-        )
-        return sql, modified_params
+        return _bind_statement(sql, params)
 
     # TODO: fix this method
     def execute_sql(self, returning_fields=None):
@@ -593,7 +1138,7 @@ class SQLUpdateCompiler(compiler.SQLUpdateCompiler):
             return cursor.rowcount
 
 
-class SQLAggregateCompiler(SQLAggregateCompiler):
+class SQLAggregateCompiler(TypedParamsMixin, SQLAggregateCompiler):
     def as_sql(self):
         """
         Create the SQL for this query. Return the SQL string and list of
@@ -610,9 +1155,21 @@ class SQLAggregateCompiler(SQLAggregateCompiler):
         params = tuple(params)
 
         inner_query_sql, inner_query_params = self.query.inner_query.get_compiler(
-            self.using,
+            connection=self.connection,
             elide_empty=self.elide_empty,
         ).as_sql(with_col_aliases=True)
         sql = f"SELECT {sql} FROM ({inner_query_sql}) subquery"
-        params += inner_query_params
-        return sql, params
+        params += tuple(inner_query_params)
+        return _bind_statement(sql, params)
+
+    def execute_sql(
+        self, result_type=MULTI, chunked_fetch=False, chunk_size=GET_ITERATOR_CHUNK_SIZE
+    ):
+        with _tx_mode(self):
+            return retry_read(
+                self.connection,
+                functools.partial(
+                    super().execute_sql, result_type, chunked_fetch, chunk_size
+                ),
+                sender=self.__class__,
+            )
@@ -0,0 +1,9 @@
+from django.db.models.sql.subqueries import InsertQuery
+
+
+class UpsertQuery(InsertQuery):
+    compiler = "SQLUpsertCompiler"
+
+
+class BulkUpdateQuery(InsertQuery):
+    compiler = "SQLBulkUpdateCompiler"
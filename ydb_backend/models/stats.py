@@ -0,0 +1,35 @@
+from django.db import connections
+
+
+def estimated_count(queryset, threshold=None):
+    """
+    Return the number of objects in queryset.
+
+    A queryset over a whole table is counted from the table statistics
+    instead of a full scan, unless the statistics show fewer than threshold
+    rows (the estimated_count_threshold backend option by default). Filtered
+    querysets and small tables are counted exactly.
+    """
+    if queryset._result_cache is not None:
+        return len(queryset._result_cache)
+
+    query = queryset.query
+    if (
+        query.where
+        or query.is_sliced
+        or query.distinct
+        or query.combinator
+        or query.group_by is not None
+    ):
+        return queryset.count()
+
+    connection = connections[queryset.db]
+    if threshold is None:
+        threshold = connection.get_backend_option("estimated_count_threshold")
+    with connection.cursor() as cursor:
+        estimate = connection.introspection.get_table_row_estimate(
+            cursor, queryset.model._meta.db_table
+        )
+    if estimate is None or estimate < threshold:
+        return queryset.count()
+    return estimate
@@ -0,0 +1,199 @@
+import base64
+import binascii
+import json
+from collections.abc import Sequence
+
+from django.core.exceptions import ValidationError
+from django.core.paginator import InvalidPage
+from django.core.paginator import Paginator
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from django.db.models import QuerySet
+from django.utils.functional import cached_property
+
+from .models.stats import estimated_count
+
+
+class InvalidToken(InvalidPage):
+    pass
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator that counts a large unfiltered queryset from the table
+    statistics instead of a full scan, e.g. for ModelAdmin.paginator.
+    """
+
+    @cached_property
+    def count(self):
+        if isinstance(self.object_list, QuerySet):
+            return estimated_count(self.object_list)
+        return len(self.object_list)
+
+
+class KeysetPaginator:
+    """
+    Paginate a queryset by seeking past the last row of the previous page
+    instead of using LIMIT/OFFSET, so every page costs the same.
+
+    Pages are addressed by opaque tokens that hold the ordering values of a
+    row. The queryset is ordered by its ordering plus the primary key, which
+    must only reference fields of the model. NULL values sort first, as in
+    YDB.
+    """
+
+    def __init__(self, object_list, per_page):
+        self.object_list = object_list
+        self.per_page = int(per_page)
+        self.ordering = self._get_ordering()
+
+    def _get_ordering(self):
+        query = self.object_list.query
+        opts = self.object_list.model._meta
+        order_by = query.order_by or (opts.ordering if query.default_ordering else ())
+
+        ordering = []
+        for item in order_by:
+            name = item.lstrip("-") if isinstance(item, str) else None
+            if not name or name == "?" or "__" in name:
+                error_message = (
+                    f"KeysetPaginator can only order by fields of the model, "
+                    f"got {item!r}."
+                )
+                raise ValueError(error_message)
+            field = opts.pk if name == "pk" else opts.get_field(name)
+            ordering.append((field, item.startswith("-")))
+            if field.primary_key:
+                return ordering
+
+        ordering.append((opts.pk, False))
+        return ordering
+
+    @cached_property
+    def count(self):
+        """
+        Return the total number of objects, estimated from the table
+        statistics for a large unfiltered queryset.
+        """
+        return estimated_count(self.object_list)
+
+    def get_page(self, token=None):
+        """
+        Return the page that follows (or, for a previous_token, precedes) the
+        row of the token, the first page when token is empty.
+        """
+        if token:
+            values, backwards = self._decode_token(token)
+        else:
+            values, backwards = None, False
+
+        ordering = [
+            (field, descending != backwards) for field, descending in self.ordering
+        ]
+        queryset = self.object_list
+        if values is not None:
+            queryset = queryset.filter(self._seek(ordering, values))
+        queryset = queryset.order_by(
+            *[
+                f"-{field.attname}" if descending else field.attname
+                for field, descending in ordering
+            ]
+        )
+
+        objects = list(queryset[:self.per_page + 1])
+        has_more = len(objects) > self.per_page
+        objects = objects[:self.per_page]
+        if backwards:
+            objects.reverse()
+            return KeysetPage(objects, self, has_more, has_next=values is not None)
+        return KeysetPage(objects, self, values is not None, has_next=has_more)
+
+    @staticmethod
+    def _seek(ordering, values):
+        """
+        Return the filter for the rows after values in the given ordering:
+        (a > x) OR (a = x AND b > y) OR ...
+        """
+        condition = Q()
+        equal = Q()
+        for (field, descending), value in zip(ordering, values):
+            name = field.attname
+            if value is None:
+                after = None if descending else Q(**{f"{name}__isnull": False})
+                same = Q(**{f"{name}__isnull": True})
+            elif descending:
+                after = Q(**{f"{name}__lt": value})
+                if field.null:
+                    after |= Q(**{f"{name}__isnull": True})
+                same = Q(**{name: value})
+            else:
+                after = Q(**{f"{name}__gt": value})
+                same = Q(**{name: value})
+
+            if after is not None:
+                condition |= equal & after
+            equal &= same
+        return condition
+
+    def _get_values(self, obj):
+        return [getattr(obj, field.attname) for field, _ in self.ordering]
+
+    def _encode_token(self, obj, backwards):
+        data = json.dumps(
+            [backwards, self._get_values(obj)],
+            cls=DjangoJSONEncoder,
+            separators=(",", ":"),
+        )
+        return base64.urlsafe_b64encode(data.encode()).decode().rstrip("=")
+
+    def _decode_token(self, token):
+        try:
+            data = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+            backwards, values = json.loads(data)
+            if not isinstance(values, list) or len(values) != len(self.ordering):
+                raise InvalidToken("That page token is invalid")
+            return [
+                None if value is None else field.to_python(value)
+                for (field, _), value in zip(self.ordering, values)
+            ], bool(backwards)
+        except (binascii.Error, UnicodeDecodeError, TypeError, ValueError,
+                ValidationError) as e:
+            raise InvalidToken("That page token is invalid") from e
+
+
+class KeysetPage(Sequence):
+    def __init__(self, object_list, paginator, has_previous, has_next):
+        self.object_list = object_list
+        self.paginator = paginator
+        self._has_previous = has_previous
+        self._has_next = has_next
+
+    def __repr__(self):
+        return f"<KeysetPage of {len(self.object_list)} objects>"
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self._has_next and bool(self.object_list)
+
+    def has_previous(self):
+        return self._has_previous and bool(self.object_list)
+
+    def has_other_pages(self):
+        return self.has_previous() or self.has_next()
+
+    @cached_property
+    def next_token(self):
+        if not self.has_next():
+            return None
+        return self.paginator._encode_token(self.object_list[-1], backwards=False)
+
+    @cached_property
+    def previous_token(self):
+        if not self.has_previous():
+            return None
+        return self.paginator._encode_token(self.object_list[0], backwards=True)
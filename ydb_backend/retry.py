@@ -0,0 +1,308 @@
+import contextvars
+import functools
+import logging
+import random
+import re
+import threading
+import time
+from collections import namedtuple
+
+import ydb
+from django.db import transaction
+
+from .signals import retry_attempted
+from .signals import retry_finished
+
+logger = logging.getLogger("django_ydb_backend.retry")
+
+Backoff = namedtuple("Backoff", ["slot", "ceiling"])
+
+# Errors that are retried after a short delay: the request didn't reach a
+# tablet or the session has to be replaced.
+FAST_BACKOFF = Backoff(slot=0.005, ceiling=10)
+# Errors that are retried after a longer delay: the transaction lost its
+# locks or the database sheds load.
+SLOW_BACKOFF = Backoff(slot=0.05, ceiling=6)
+
+DEFAULT_MAX_RETRIES = 5
+
+_fast_backoff_errors = (
+    ydb.issues.Unavailable,
+    ydb.issues.ClientInternalError,
+    ydb.issues.SessionExpired,
+    ydb.issues.SessionBusy,
+    ydb.issues.BadSession,
+)
+_slow_backoff_errors = (
+    ydb.issues.Aborted,
+    ydb.issues.Overloaded,
+    ydb.issues.SessionPoolEmpty,
+    ydb.issues.ConnectionError,
+)
+# Errors after which the request may or may not have been applied, only
+# retried for idempotent operations.
+_idempotent_errors = (
+    ydb.issues.Undetermined,
+    ydb.issues.Timeout,
+    ydb.issues.DeadlineExceed,
+)
+
+# Statements whose only effect is to read: optional DECLARE and PRAGMA lines,
+# then a SELECT.
+_read_re = re.compile(
+    r"\s*(?:(?:DECLARE|PRAGMA)\b[^;]*;\s*)*SELECT\b", re.IGNORECASE
+)
+
+# Statements run within call_with_retry() aren't retried by the driver, so
+# the attempts aren't multiplied.
+NO_DRIVER_RETRIES = ydb.RetrySettings(max_retries=0)
+
+
+class _RetriedCall:
+    """The state of the call_with_retry() attempt running in a context."""
+
+    def __init__(self):
+        # Whether a statement other than a SELECT succeeded. Statements are
+        # committed one by one, so the attempt can't be undone.
+        self.wrote = False
+
+
+_current_call = contextvars.ContextVar("ydb_retried_call", default=None)
+
+
+def get_statement_retry_settings(default):
+    """
+    Return the driver RetrySettings of a statement executed now, default
+    outside of call_with_retry().
+    """
+    return default if _current_call.get() is None else NO_DRIVER_RETRIES
+
+
+def statement_executed(sql):
+    """
+    Record a statement that succeeded, for the call_with_retry() attempt
+    running in the current context.
+    """
+    call = _current_call.get()
+    if call is not None and not _read_re.match(sql):
+        call.wrote = True
+
+
+class RetryBudget:
+    """
+    Limit the retries of the process to ratio of the calls, plus an initial
+    allowance of capacity retries, so that a database that keeps failing
+    doesn't get max_retries times the load.
+    """
+
+    def __init__(self, ratio=0.2, capacity=100):
+        self.ratio = ratio
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._lock = threading.Lock()
+
+    def deposit(self):
+        with self._lock:
+            self._tokens = min(self.capacity, self._tokens + self.ratio)
+
+    def withdraw(self):
+        with self._lock:
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+
+    def reset(self):
+        with self._lock:
+            self._tokens = float(self.capacity)
+
+
+retry_budget = RetryBudget()
+
+
+def get_ydb_error(exc):
+    """
+    Return the YDB driver error behind a Django or DB-API exception, None if
+    the exception doesn't come from YDB.
+    """
+    seen = set()
+    while exc is not None and id(exc) not in seen:
+        if isinstance(exc, ydb.Error):
+            return exc
+        original_error = getattr(exc, "original_error", None)
+        if isinstance(original_error, ydb.Error):
+            return original_error
+        seen.add(id(exc))
+        exc = exc.__cause__ or exc.__context__
+    return None
+
+
+def get_backoff(exc, idempotent=False):
+    """
+    Return the Backoff to retry after exc with, None if it can't be retried.
+    """
+    error = get_ydb_error(exc)
+    if isinstance(error, _fast_backoff_errors):
+        return FAST_BACKOFF
+    if isinstance(error, _slow_backoff_errors):
+        return SLOW_BACKOFF
+    if idempotent and isinstance(error, _idempotent_errors):
+        return SLOW_BACKOFF
+    return None
+
+
+def _get_delay(backoff, attempt):
+    """
+    Return the delay before retry number attempt (from 0), between half and
+    all of slot * 2 ** attempt seconds.
+    """
+    delay = backoff.slot * (1 << min(attempt, backoff.ceiling))
+    return delay * (0.5 + random.random() / 2)  # noqa: S311
+
+
+def call_with_retry(func, args=(), kwargs=None, *, sender=None, max_retries=None,
+                    idempotent=False):
+    """
+    Call func(*args, **kwargs) and call it again while it fails with a
+    retryable YDB error, up to max_retries times and within the retry budget
+    of the process.
+
+    An attempt that wrote is only retried when idempotent is set: there are
+    no interactive transactions, so its statements were already committed.
+    Within another call_with_retry(), func is called once and the outer call
+    retries.
+    """
+    if _current_call.get() is not None:
+        return func(*args, **kwargs)
+    if max_retries is None:
+        max_retries = DEFAULT_MAX_RETRIES
+    kwargs = kwargs or {}
+    sender = sender or func
+    start = time.monotonic()
+    retry_budget.deposit()
+
+    attempt = 0
+    while True:
+        call = _RetriedCall()
+        token = _current_call.set(call)
+        try:
+            try:
+                result = func(*args, **kwargs)
+            finally:
+                _current_call.reset(token)
+        except Exception as e:
+            backoff = get_backoff(e, idempotent)
+            if (
+                backoff is None
+                or (call.wrote and not idempotent)
+                or attempt >= max_retries
+                or not retry_budget.withdraw()
+            ):
+                retry_finished.send(
+                    sender=sender,
+                    attempts=attempt + 1,
+                    duration=time.monotonic() - start,
+                    error=e,
+                )
+                raise
+
+            delay = _get_delay(backoff, attempt)
+            attempt += 1
+            logger.warning(
+                "Retrying %s in %.3fs (attempt %d of %d) after %s",
+                getattr(sender, "__qualname__", sender),
+                delay,
+                attempt,
+                max_retries,
+                type(get_ydb_error(e)).__name__,
+            )
+            retry_attempted.send(
+                sender=sender, attempt=attempt, delay=delay, error=e
+            )
+            time.sleep(delay)
+        else:
+            retry_finished.send(
+                sender=sender,
+                attempts=attempt + 1,
+                duration=time.monotonic() - start,
+                error=None,
+            )
+            return result
+
+
+def ydb_retry(func=None, *, max_retries=None, idempotent=False):
+    """
+    Decorate func to run again when it fails with a retryable YDB error such
+    as ABORTED (the locks of the transaction were invalidated), OVERLOADED or
+    UNAVAILABLE, with jittered exponential backoff.
+
+    Errors after which a write may have been applied (UNDETERMINED,
+    timeouts), and calls that wrote before failing, are only retried when
+    idempotent is set. func must be safe to run again, e.g. not send an
+    email before its last query.
+    """
+    if func is None:
+        return functools.partial(
+            ydb_retry, max_retries=max_retries, idempotent=idempotent
+        )
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        return call_with_retry(
+            func, args, kwargs, max_retries=max_retries, idempotent=idempotent
+        )
+
+    return wrapper
+
+
+def ydb_atomic(func=None, *, using=None, savepoint=True, durable=False,
+               max_retries=None, idempotent=False):
+    """
+    Decorate func to run in transaction.atomic(using) and run the whole block
+    again when it fails with a retryable YDB error, see ydb_retry().
+
+    The block isn't run as one YDB transaction: each statement is committed
+    on its own. So a block that wrote before failing is only run again when
+    idempotent is set, i.e. its writes are safe to repeat.
+
+    Within an outer atomic block the error is raised to the outer block, as
+    only the whole transaction can be retried.
+    """
+    if func is None:
+        return functools.partial(
+            ydb_atomic,
+            using=using,
+            savepoint=savepoint,
+            durable=durable,
+            max_retries=max_retries,
+            idempotent=idempotent,
+        )
+
+    atomic_func = transaction.atomic(using, savepoint, durable)(func)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if transaction.get_connection(using).in_atomic_block:
+            return atomic_func(*args, **kwargs)
+        return call_with_retry(
+            atomic_func,
+            args,
+            kwargs,
+            sender=func,
+            max_retries=max_retries,
+            idempotent=idempotent,
+        )
+
+    return wrapper
+
+
+def retry_read(connection, func, *args, sender=None):
+    """
+    Call func, which only reads, with retries of idempotent operations when
+    the retry_reads backend option is set and no transaction is open.
+    """
+    if connection.in_atomic_block or not connection.get_backend_option(
+        "retry_reads"
+    ):
+        return func(*args)
+    return call_with_retry(func, args, sender=sender, idempotent=True)
@@ -0,0 +1,30 @@
+from django.dispatch import Signal
+
+# Sent after each chunk of a bulk INSERT/UPSERT has been executed.
+# Arguments: ``model``, ``rows`` (number of rows in the chunk), ``size``
+# (estimated payload size in bytes) and ``duration`` (seconds).
+bulk_chunk_executed = Signal()
+
+# Sent after each chunk of a QuerySet.ydb_batched() update or delete.
+# Arguments: ``model``, ``operation`` ("update" or "delete"), ``rows``
+# (number of rows in the chunk), ``total`` (rows processed so far) and
+# ``duration`` (seconds).
+batched_chunk_executed = Signal()
+
+# Sent after a SELECT has been read page by page, either by
+# QuerySet.iterator() or to continue a result that YDB truncated.
+# Arguments: ``model``, ``pages`` (number of queries), ``rows`` (number of
+# rows read) and ``truncated`` (whether the pages continue a truncated
+# result).
+paged_read_finished = Signal()
+
+# Sent before a call of a ydb_retry() or ydb_atomic() function, or a read with
+# the retry_reads backend option, is retried after a retryable YDB error.
+# Arguments: ``attempt`` (number of the retry, from 1), ``delay`` (seconds
+# before the retry) and ``error`` (the exception).
+retry_attempted = Signal()
+
+# Sent when such a call has returned or raised.
+# Arguments: ``attempts`` (number of calls), ``duration`` (seconds, including
+# the delays) and ``error`` (the exception raised, or None).
+retry_finished = Signal()
@@ -0,0 +1,53 @@
+from contextlib import ContextDecorator
+
+import ydb
+from django.db.transaction import get_connection
+
+# Transaction modes that can be selected with ydb_tx_mode(). The read-only
+# modes don't take locks, so reads can't abort writers or be aborted by
+# them, and online_ro and stale_ro can be served by followers.
+TX_MODES = {
+    "serializable_rw": ydb.QuerySerializableReadWrite(),
+    "snapshot_ro": ydb.QuerySnapshotReadOnly(),
+    "online_ro": ydb.QueryOnlineReadOnly(),
+    "online_inconsistent_ro": ydb.QueryOnlineReadOnly(allow_inconsistent_reads=True),
+    "stale_ro": ydb.QueryStaleReadOnly(),
+}
+
+
+def check_tx_mode(mode):
+    if mode not in TX_MODES:
+        error_message = (
+            f"Unknown YDB transaction mode {mode!r}, expected one of "
+            f"{', '.join(TX_MODES)}."
+        )
+        raise ValueError(error_message)
+
+
+class TxMode(ContextDecorator):
+    """
+    Run the statements of a block in a YDB transaction mode. The modes of
+    nested blocks take precedence, the outer mode is restored on exit.
+    """
+
+    def __init__(self, mode, using):
+        check_tx_mode(mode)
+        self.mode = mode
+        self.using = using
+
+    def __enter__(self):
+        get_connection(self.using).ydb_tx_modes.append(self.mode)
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        get_connection(self.using).ydb_tx_modes.pop()
+
+
+def ydb_tx_mode(mode, using=None):
+    """
+    Return a context manager (or decorator) that runs the statements of the
+    database using in the given mode of TX_MODES, e.g. "snapshot_ro".
+
+    Each statement is its own transaction. Read-only modes are only meant
+    for reads.
+    """
+    return TxMode(mode, using)